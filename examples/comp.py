@@ -6,7 +6,7 @@ import numpy as np
 import sage.all as sg
 
 from settings import log_handler
-from spheres.gg_cocycle import gg
+from spheres.gg_cocycle import gg_many
 from spheres.simplicial_complex import Sphere
 
 log_handler.setLevel(100)
@@ -41,15 +41,14 @@ class CompSphere(Sphere):
 
 
 if __name__ == '__main__':
-    for m_ in range(2, 4):
-        for n_ in range(1, 5):
-            k_ = [[0, 2], [0, n_], [0, m_]]
-            print(k_)
-
-            s = CompSphere(k_)
-            s = s.rename_vertices({v: i for (i, v) in enumerate(s.vertices())})
-
-            t = time.time()
-            print(gg(s, 15))
-            t1 = time.time()
-            print('time', t1 - t)
+    ks = [[[0, 2], [0, n_], [0, m_]] for m_ in range(2, 4) for n_ in range(1, 5)]
+    spheres = []
+    for k_ in ks:
+        s = CompSphere(k_)
+        spheres.append(s.rename_vertices({v: i for (i, v) in enumerate(s.vertices())}))
+
+    t = time.time()
+    for i, res in gg_many(spheres, 15):
+        print(ks[i])
+        print(res)
+        print('elapsed time', time.time() - t)  # of all spheres so far, they share the pool
@@ -8,3 +8,10 @@ log_handler.setLevel(LOG_LEVEL)
 log_handler.setFormatter(log_formatter)
 
 TMP_DIR = tempfile.gettempdir()
+
+SPHERE_FULL_VALIDATION = False  # debug switch: check homology of every constructed Sphere
+GAP_POOL_SIZE = 1  # number of GAP sessions in gap_executor.default_pool() of every process
+GG_CACHE_PATH = None  # sqlite file with cached gg_cocycle values, no persistent cache if None
+GG_CACHE_MAX_ENTRIES = 1000000
+GG_FLOAT_MAX_DENOMINATOR = 10000  # bound for denominators of gg_cocycle values recovered by the float64 backend
+INVARIANTS_CACHE_SIZE = 100000  # invariants of spheres shared by canonical keys in spheres.invariants
@@ -0,0 +1,270 @@
+"""In-process version of the BISTELLAR heuristics (see BISTELLAR.gap).
+
+The heuristics reduce a sphere to the boundary of a simplex by bistellar moves.
+"""
+import random
+import time
+from itertools import combinations
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+ROUNDS_MAX = 50000
+STOP_CHECK_PERIOD = 64  # rounds between checks of stop_event, which can be a proxy to another process
+
+Face = FrozenSet[int]
+
+
+class _IndexedSet:
+    """Set with O(1) insertion, deletion and access by position (for uniform random choice)."""
+    def __init__(self):
+        self._items = []
+        self._positions = dict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def add(self, item):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        i = self._positions.pop(item, None)
+        if i is None:
+            return
+        last = self._items.pop()
+        if i < len(self._items):
+            self._items[i] = last
+            self._positions[last] = i
+
+
+class BistellarEngine:
+    """Complex with bistellar move options kept up to date after every flip.
+
+    Options are stored as in BISTELLAR: options[r] contains faces sigma with max - r vertices whose star
+    consists of r + 1 facets, so the move sigma -> tau replaces the star of sigma by the star of tau.
+    """
+    def __init__(self, facets: Iterable[Iterable[int]], rng: Optional[random.Random] = None):
+        self.facets = set(frozenset(f) for f in facets)
+        self.max = len(next(iter(self.facets)))  # number of vertices in a facet
+        self.dim = self.max - 1
+        self.rng = rng if rng is not None else random.Random()
+
+        self.stars: Dict[int, set] = dict()
+        for f in self.facets:
+            for v in f:
+                self.stars.setdefault(v, set()).add(f)
+
+        self.options = [_IndexedSet() for _ in range(self.max)]
+        self.taus: Dict[Face, Face] = dict()
+        faces = set()
+        for f in self.facets:
+            for k in range(1, self.max):
+                faces.update(frozenset(q) for q in combinations(sorted(f), k))
+        self._update_options(faces)
+
+    def star(self, face: Face) -> set:
+        stars = sorted((self.stars.get(v, set()) for v in face), key=len)
+        if not stars:
+            return set(self.facets)
+        return set(f for f in stars[0] if face <= f)
+
+    def is_face(self, face: Face) -> bool:
+        stars = sorted((self.stars.get(v, set()) for v in face), key=len)
+        return any(face <= f for f in stars[0])
+
+    def _update_options(self, faces: Iterable[Face]):
+        for face in faces:
+            r = self.max - len(face)
+            self.options[r].discard(face)
+            self.taus.pop(face, None)
+            star = self.star(face)
+            if r >= 1 and len(star) == r + 1:
+                self.options[r].add(face)
+                self.taus[face] = frozenset().union(*star) - face
+
+    def move(self, sigma: Face, tau: Face):
+        removed = [sigma | (tau - {x}) for x in tau]
+        added = [tau | (sigma - {y}) for y in sigma]
+        for f in removed:
+            self.facets.remove(f)
+            for v in f:
+                self.stars[v].discard(f)
+        for f in added:
+            self.facets.add(f)
+            for v in f:
+                self.stars.setdefault(v, set()).add(f)
+        for v in sigma:
+            if not self.stars[v]:
+                del self.stars[v]
+        faces = set()
+        for f in removed + added:
+            for k in range(1, self.max):
+                faces.update(frozenset(q) for q in combinations(sorted(f), k))
+        self._update_options(faces)
+
+    def is_valid_option(self, sigma: Face) -> bool:
+        return not self.is_face(self.taus[sigma])
+
+    def choose(self, rs: Sequence[int], attempts: int = 16) -> Optional[Face]:
+        """Uniformly random valid option from options[r] for r in rs, None if there are no valid options."""
+        rs = sorted(set(r for r in rs if 1 <= r < self.max))
+        sizes = [len(self.options[r]) for r in rs]
+        total = sum(sizes)
+        if not total:
+            return None
+        for _ in range(attempts):  # rejection sampling keeps the choice uniform among valid options
+            i = self.rng.randrange(total)
+            for r, size in zip(rs, sizes):
+                if i < size:
+                    sigma = self.options[r][i]
+                    break
+                i -= size
+            if self.is_valid_option(sigma):
+                return sigma
+        valid = [sigma for r in rs for sigma in self.options[r] if self.is_valid_option(sigma)]
+        return self.rng.choice(valid) if valid else None
+
+
+class _Strategy:
+    """Heating and relaxation schedule of BISTELLAR, move(r) is a r-move, reverse(r) is a (max - r - 1)-move."""
+    def __init__(self, engine: BistellarEngine):
+        self.engine = engine
+        self.heating = 0
+        self.relaxation = 0
+        self.stop = False
+
+    def moves(self, *rs):
+        return self.engine.choose(rs)
+
+    def reverse(self, *rs):
+        return self.engine.choose([self.engine.max - r - 1 for r in rs])
+
+    def _relax(self, period, heating):
+        if self.relaxation == period:
+            self.heating = heating
+            self.relaxation = 0
+        self.relaxation += 1
+
+    def next_option(self) -> Optional[Face]:
+        dim = self.engine.dim
+        if dim == 1:
+            option = self.reverse(0)
+            self.stop = option is None
+        elif dim == 2:
+            option = self.reverse(0) or self.moves(1)
+            self.stop = option is None
+        elif dim == 3:
+            if self.heating > 0:
+                option = self.moves(1)
+                if option is None:
+                    option = self.reverse(1)
+                    self.heating = 0
+                self.heating -= 1
+            else:
+                option = self.reverse(0) or self.reverse(1)
+                if option is None:
+                    option = self.moves(1)
+                    self._relax(10, 15)
+                    self.stop = option is None
+        elif dim == 4:
+            if self.heating > 0:
+                option = self.moves(1, 2) or self.reverse(1)
+                self.heating -= 1
+            else:
+                option = self.reverse(0) or self.reverse(1)
+                if option is None:
+                    option = self.moves(1, 2)
+                    self._relax(15, 20)
+                    self.stop = option is None
+        elif dim == 5:
+            if self.heating > 0:
+                option = self.moves(2) or self.moves(1)
+                if option is None:
+                    option = self.reverse(1, 2)
+                    self.heating = 1
+                self.heating -= 1
+            else:
+                option = self.reverse(0) or self.reverse(1) or self.reverse(2)
+                if option is None:
+                    option = self.moves(1, 2)
+                    self._relax(10, 20)
+                    self.stop = option is None
+        elif dim == 6:
+            if self.heating > 0:
+                if self.heating % 2 == 0:
+                    option = self.moves(2) or self.moves(1, 3)
+                else:
+                    option = self.moves(1, 2, 3)
+                if option is None:
+                    option = self.reverse(1, 2)
+                    self.heating = 0
+                    self.stop = option is None
+                self.heating -= 1
+            else:
+                option = self.reverse(0) or self.reverse(1) or self.reverse(2)
+                if option is None:
+                    option = self.moves(1, 2, 3)
+                    self._relax(20, 25)
+                    self.stop = option is None
+        else:
+            option = None
+            if self.heating > 0:
+                for t in range((dim + 1) // 2 - 1, 0, -1):
+                    option = option or self.moves(t)
+                if option is None:
+                    option = self.reverse(*range(1, dim // 2 + 1))
+                    self.heating = 1
+                self.heating -= 1
+            else:
+                for t in range(0, (dim + 1) // 2):
+                    option = option or self.reverse(t)
+                if option is None:
+                    option = self.moves(*range(1, dim // 2 + 1))
+                    self._relax(10, 20)
+                    self.stop = option is None
+        return option
+
+
+def find_path_to_simplex(facets: Sequence[Sequence[Hashable]], timeout: Optional[float] = None, seed=None,
+                         rounds_max: int = ROUNDS_MAX, stop_event=None) -> List[Tuple[List, List]]:
+    """Search for bistellar moves reducing a sphere to the boundary of a simplex.
+
+    :return: list of moves [sigma, tau] in terms of vertex labels of facets (the same format as BISTELLAR log).
+    :param stop_event: object with is_set() method (e.g. threading.Event) allowing to cancel the search.
+    """
+    labels = []
+    ids = dict()
+    for f in facets:
+        for v in f:
+            if v not in ids:
+                ids[v] = len(labels)
+                labels.append(v)
+    engine = BistellarEngine([[ids[v] for v in f] for f in facets], rng=random.Random(seed))
+    strategy = _Strategy(engine)
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    moves = []
+    rounds = 1
+    while not strategy.stop and rounds <= rounds_max:
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError('Bistellar path search timed out.')
+        if stop_event is not None and rounds % STOP_CHECK_PERIOD == 0 and stop_event.is_set():
+            raise TimeoutError('Bistellar path search was cancelled.')
+        sigma = strategy.next_option()
+        if sigma is None:
+            rounds += 1  # a round without a move still counts towards rounds_max
+            continue
+        tau = engine.taus[sigma]
+        moves.append([[labels[v] for v in sorted(sigma)], [labels[v] for v in sorted(tau)]])
+        engine.move(sigma, tau)
+        rounds += 1
+
+    if len(engine.facets) != engine.dim + 2:
+        raise ValueError('The complex was not reduced to the boundary of a simplex.')
+    return moves
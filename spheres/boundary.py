@@ -0,0 +1,45 @@
+"""Sparse boundary and coboundary matrices of pure complexes built directly from facets."""
+from typing import Dict, Hashable, Iterable, Sequence, Tuple
+
+from spheres.homology import faces_by_dimension
+
+Entries = Dict[Tuple[int, int], int]
+
+
+class SimplexIndex:
+    """Faces of a pure complex with a stable simplex <-> index map.
+
+    faces[k] lists the k-faces as sorted tuples of vertices, in lexicographic order or in the order orders[k]
+    (e.g. the basis order of sage chain modules, so that matrices act on their vectors).
+    """
+    def __init__(self, facets: Iterable[Iterable[Hashable]], orders: Dict[int, Iterable[Iterable[Hashable]]] = None):
+        self.faces = faces_by_dimension([list(f) for f in facets])
+        for k, order in (orders or dict()).items():
+            order = [tuple(sorted(f)) for f in order]
+            if len(order) != len(self.faces[k]) or set(order) != set(self.faces[k]):
+                raise ValueError(f'Not an order of {k}-faces!')
+            self.faces[k] = order
+        self.index = [{f: i for (i, f) in enumerate(q)} for q in self.faces]
+
+    def dimension(self) -> int:
+        return len(self.faces) - 1
+
+    def __getitem__(self, simplex: Sequence[Hashable]) -> int:
+        """Index of a simplex among faces of its dimension."""
+        try:
+            return self.index[len(simplex) - 1][tuple(sorted(simplex))]
+        except (IndexError, KeyError):
+            raise ValueError('Not a face!')
+
+    def shape(self, k: int) -> Tuple[int, int]:
+        """Shape of the k-th boundary matrix."""
+        return len(self.faces[k]), len(self.faces[k - 1])
+
+    def boundary(self, k: int) -> Entries:
+        """Entries (i, j) of the k-th boundary matrix: row i is the boundary of the i-th k-face."""
+        index = self.index[k - 1]
+        return {(i, index[f[:r] + f[r + 1:]]): (-1) ** r for (i, f) in enumerate(self.faces[k]) for r in range(k + 1)}
+
+    def coboundary(self, k: int) -> Entries:
+        """Entries of the k-th coboundary matrix (from k-cochains to (k+1)-cochains), the transpose of boundary(k+1)."""
+        return {(j, i): c for ((i, j), c) in self.boundary(k + 1).items()}
@@ -0,0 +1,119 @@
+"""Checkpoint files of long gg runs: paths of spheres and values of links of their moves, appended as they are found."""
+import hashlib
+import json
+import operator
+import os
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+Facets = Iterable[Iterable[Hashable]]
+
+
+def _encode(v):
+    """JSON form of a vertex: integers (also sage ones) and strings as they are, tuples as {"tuple": [...]}."""
+    if isinstance(v, str):
+        return v
+    if isinstance(v, tuple):
+        return {'tuple': [_encode(x) for x in v]}
+    try:
+        return operator.index(v)
+    except TypeError:
+        raise TypeError(f'vertex {v!r} cannot be saved, vertices must be integers, strings or tuples of them')
+
+
+def _decode(v):
+    """Vertex of its JSON form, hashable again."""
+    if isinstance(v, dict):
+        return tuple(_decode(x) for x in v['tuple'])
+    return v
+
+
+def _encode_moves(moves) -> List[List[List]]:
+    return [[[_encode(v) for v in sigma], [_encode(v) for v in tau]] for (sigma, tau) in moves]
+
+
+def _decode_moves(moves) -> List[List[List]]:
+    return [[[_decode(v) for v in sigma], [_decode(v) for v in tau]] for (sigma, tau) in moves]
+
+
+def sphere_key(facets: Facets) -> str:
+    """Key of a sphere given by facets with its labels of vertices (moves of paths refer to them)."""
+    facets = sorted(sorted(str(v) for v in f) for f in facets)
+    return hashlib.sha256(json.dumps(facets).encode()).hexdigest()
+
+
+def path_key(facets: Facets, moves: List[List[List]]) -> str:
+    """Key of a path of moves [sigma, tau] starting from the sphere with facets."""
+    return hashlib.sha256(json.dumps([sphere_key(facets), _encode_moves(moves)]).encode()).hexdigest()
+
+
+class Checkpoint:
+    """Append-only file of JSON lines.
+
+    {"sphere": ..., "path": ..., "moves": [[sigma, tau], ...]} records the path chosen for a sphere,
+    {"path": ..., "move": i, "vertex": v, "value": ...} records the value of the link of v in the i-th move of a path.
+    Vertices are saved as integers, strings or {"tuple": [...]} and are loaded back as such (sage integers as ints).
+    A line cut by a crash is ignored when the file is loaded.
+    """
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._paths: Dict[str, List[List[List]]] = dict()  # sphere key -> moves
+        self._values: Dict[str, Dict[Tuple, str]] = dict()  # path key -> {(move, vertex): value}
+        complete = True
+        if os.path.exists(filename):
+            complete = self._load()
+        self._file = open(filename, 'a')
+        if not complete:
+            self._file.write('\n')  # after a line cut by a crash
+
+    def _load(self) -> bool:
+        """Reads the records, returns False if the last line is not complete."""
+        line = '\n'
+        with open(self.filename) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'moves' in record:
+                    self._paths[record['sphere']] = _decode_moves(record['moves'])
+                else:
+                    key = record['move'], _decode(record['vertex'])
+                    self._values.setdefault(record['path'], dict())[key] = record['value']
+        return line.endswith('\n')
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def path(self, facets: Facets) -> Optional[List[List[List]]]:
+        """Moves [sigma, tau] of the last path saved for the sphere, None if there is no such path."""
+        return self._paths.get(sphere_key(facets))
+
+    def add_path(self, facets: Facets, moves: List[List[List]]) -> str:
+        """Saves the path of moves [sigma, tau] for the sphere, returns its key."""
+        facets = [list(f) for f in facets]
+        encoded = _encode_moves(moves)
+        moves = _decode_moves(encoded)
+        key, s_key = path_key(facets, moves), sphere_key(facets)
+        if self._paths.get(s_key) != moves:
+            self._paths[s_key] = moves
+            self._write({'sphere': s_key, 'path': key, 'moves': encoded})
+        return key
+
+    def values(self, key: str) -> Dict[Tuple, str]:
+        """Saved values {(move index, vertex): value} of the path with the key, the values are strings."""
+        return dict(self._values.get(key, dict()))
+
+    def put(self, key: str, move: int, vertex, value):
+        encoded = _encode(vertex)
+        self._values.setdefault(key, dict())[move, _decode(encoded)] = str(value)
+        self._write({'path': key, 'move': move, 'vertex': encoded, 'value': str(value)})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,61 @@
+"""Persistent cache of cocycle values keyed by canonical forms of moves (see BistellarMove.canonical_key)."""
+import sqlite3
+import time
+from typing import Optional
+
+import settings
+
+
+class CocycleCache:
+    """SQLite table key -> value (a string), least recently used entries are evicted above max_entries.
+
+    The file can be shared by several processes and runs.
+    """
+    evict_fraction = .1  # part of max_entries evicted at once
+
+    def __init__(self, path: str, max_entries: int = None):
+        self.path = path
+        self.max_entries = settings.GG_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS cocycles '
+                                 '(key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS cocycles_used ON cocycles (used)')
+        self._size = len(self)
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM cocycles').fetchone()[0]
+
+    def __contains__(self, key: str):
+        return self._connection.execute('SELECT 1 FROM cocycles WHERE key = ?', (key,)).fetchone() is not None
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection.execute('SELECT value FROM cocycles WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._connection.execute('UPDATE cocycles SET used = ? WHERE key = ?', (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, value: str):
+        cursor = self._connection.execute('INSERT OR REPLACE INTO cocycles (key, value, used) VALUES (?, ?, ?)',
+                                          (key, str(value), time.time()))
+        self._size += cursor.rowcount
+        if self._size > self.max_entries:
+            self._size = len(self)  # other processes could evict entries too
+            if self._size > self.max_entries:
+                self.evict(self._size - self.max_entries + int(self.max_entries * self.evict_fraction))
+
+    def evict(self, n: int):
+        """Deletes n least recently used entries."""
+        self._connection.execute('DELETE FROM cocycles WHERE key IN '
+                                 '(SELECT key FROM cocycles ORDER BY used, rowid LIMIT ?)', (n,))
+        self._size = len(self)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
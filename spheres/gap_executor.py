@@ -1,126 +1,347 @@
 import asyncio
+import atexit
+import codecs
+import os
+import threading
+import time
+
+import settings
 from settings import gap_path
 
 
+GAP_PROMPT = '\x1b[1m\x1b[34mgap> \x1b[0m\x1b[31m'  # gap prompt string
+
+
+def latency_stats(latencies) -> dict:
+    """Number, total, mean and maximum of request latencies (in seconds)."""
+    n = len(latencies)
+    if not n:
+        return {'count': 0, 'total': 0., 'mean': 0., 'max': 0.}
+    total = sum(latencies)
+    return {'count': n, 'total': total, 'mean': total / n, 'max': max(latencies)}
+
+
 class Communicator:
+    chunk_size = 1 << 16  # bytes read from GAP at once
+
     def __init__(self, process):
         self.counter = 0
         self.process = process
 
         self.answers = ''
         self.questions = []
-        self._step = .3
+        self.latencies = []  # seconds from sending a request to its completion
+        self.eof = False
 
         self.listener = None
 
     async def process_errors(self):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
         while True:
-            try:
-                if self.process.returncode is not None:
-                    break
-                line = await asyncio.wait_for(self.process.stderr.read(200), 1)
-                line = line.decode(errors='ignore')
-                if line:
-                    print('GAP ERROR > ', line)
+            data = await self.process.stderr.read(self.chunk_size)
+            if not data:
+                break
+            line = decoder.decode(data)
+            if line:
+                print('GAP ERROR > ', line)
+                if self.listener is not None:
                     self.listener.error(line)
-            except asyncio.TimeoutError:
-                pass
-        pass
 
     async def process_answers(self):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
         while True:
-            try:
-                if self.process.returncode is not None:
-                    break
-                line = await asyncio.wait_for(self.process.stdout.read(200), 1)
-                line = line.decode(errors='ignore')
-                self.answers += line
-                if self.listener is not None:
-                    self.listener(line)
-            except asyncio.TimeoutError:
-                pass
-        pass
+            data = await self.process.stdout.read(self.chunk_size)
+            if not data:
+                break
+            line = decoder.decode(data)
+            self.answers += line
+            if self.listener is not None:
+                self.listener(line)
+        self.eof = True
+        if self.listener is not None:
+            self.listener.set_complete()  # nothing more will come, do not wait for the timeout
 
     async def request(self, lines, timeout=1, listener=None):
         if not isinstance(lines, list):
             lines = [lines]
         self.listener = listener
         n_answers = len(self.answers)
+        start = time.monotonic()
         for line in lines:
-            if self.process.returncode is not None:
+            if self.eof or self.process.returncode is not None:
                 return None, 'terminated', {'returncode': self.process.returncode}
             self.process.stdin.write((line + '\n').encode())
-        for _ in range(int(timeout // self._step + 1)):
-            await asyncio.sleep(self._step)
-            if self.listener is not None and self.listener.complete:
-                res = self.answers[n_answers:].split('\x1b[1m\x1b[34mgap> \x1b[0m\x1b[31m')  # gap prompt string
-                if res[-1] == '':
-                    res = res[:-1]
-                return res, 'ok', {}
-        return self.answers[n_answers:], 'ok', {'timeout': True}
+        try:
+            await self.process.stdin.drain()
+        except ConnectionError:
+            return None, 'terminated', {'returncode': self.process.returncode}
+
+        try:
+            if listener is None:
+                await asyncio.sleep(timeout)
+            else:
+                await asyncio.wait_for(asyncio.shield(listener.wait()), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if listener is None or not listener.complete:
+            return self.answers[n_answers:], 'ok', {'timeout': True}
+        if self.eof and isinstance(listener, ListenerNLines) and not listener.received:
+            return None, 'terminated', {'returncode': self.process.returncode}
+
+        self.latencies.append(time.monotonic() - start)
+        res = self.answers[n_answers:].split(GAP_PROMPT)
+        if res[-1] == '':
+            res = res[:-1]
+        return res, 'ok', {}
+
+    def latency_stats(self) -> dict:
+        return latency_stats(self.latencies)
 
 
 class Listener:
     def __init__(self):
         self.complete = False
+        self._future = None
 
-    def __call__(self, _line):
+    def wait(self) -> asyncio.Future:
+        """Future resolved as soon as the listener is complete."""
+        if self._future is None:
+            self._future = asyncio.get_event_loop().create_future()
+            if self.complete:
+                self._future.set_result(True)
+        return self._future
+
+    def set_complete(self):
         self.complete = True
+        if self._future is not None and not self._future.done():
+            self._future.set_result(True)
+
+    def __call__(self, _line):
+        self.set_complete()
 
     def error(self, _line):
-        self.complete = True
+        self.set_complete()
 
 
 class ListenerNLines(Listener):
-    def __init__(self, n=1):
+    def __init__(self, n=1, ignore_errors=False):
         super(ListenerNLines, self).__init__()
         self.n = n
+        self.ignore_errors = ignore_errors
         if n == 0:
             self.complete = True
         self.answers = ''
 
+    @property
+    def received(self):
+        return self.answers.count(GAP_PROMPT) >= self.n  # GAP may send the end of the prompt separately
+
     def __call__(self, line):
         self.answers += line
-        if self.answers.count('gap> ') >= self.n:
-            self.complete = True
+        if self.received:
+            self.set_complete()
+
+    def error(self, line):
+        if not self.ignore_errors:
+            self.set_complete()
+
+
+class GapSession:
+    """Running GAP process which can execute several series of requests."""
+    startup_timeout = 60  # seconds to wait for the first prompt of gap system
+
+    def __init__(self):
+        self.process = None
+        self.communicator = None
+        self._tasks = []
 
+    async def start(self):
+        if not isinstance(gap_path, str) and not isinstance(gap_path, bytes):
+            raise ValueError('Invalid path to GAP executable!')
+
+        loop = asyncio.get_event_loop()
+
+        self.process = await asyncio.create_subprocess_exec(
+            gap_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
+
+        self.communicator = Communicator(self.process)
+        listener = ListenerNLines(ignore_errors=True)  # warnings on startup are not fatal
+        self.communicator.listener = listener
+
+        self._tasks = [loop.create_task(self.communicator.process_answers()),
+                       loop.create_task(self.communicator.process_errors())]
+        try:
+            await asyncio.wait_for(asyncio.shield(listener.wait()), self.startup_timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise Exception('GAP did not start in time.')
+        if not listener.received:
+            await self.close()
+            raise Exception(f'GAP has terminated on startup with code {self.process.returncode}.')
+        return self
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def execute(self, requests: list, stop_event=None):
+        """Executes requests one by one.
+
+        :param stop_event: object with is_set() method (e.g. threading.Event), GAP is terminated once it is set.
+        """
+        loop = asyncio.get_event_loop()
+        watcher = None if stop_event is None else loop.create_task(self._watch(stop_event))
+        try:
+            return await self._execute(requests)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _watch(self, stop_event, period=.1):
+        while not stop_event.is_set():
+            await asyncio.sleep(period)
+        self.terminate()
+
+    async def _execute(self, requests: list):
+        loop = asyncio.get_event_loop()
+        c = self.communicator
+
+        answers = []
+        for req in requests:
+            if isinstance(req, str):
+                ans = await loop.create_task(c.request(req, listener=ListenerNLines()))
+            elif isinstance(req, tuple):
+                ans = await loop.create_task(c.request(*req, listener=ListenerNLines()))
+            elif isinstance(req, dict):
+                ans = await loop.create_task(c.request(**req))
+            else:
+                raise ValueError('Unknown type of request!')
+
+            if ans[1] != 'ok':
+                raise Exception(f'Gap communication error {ans}')
+            answers.append(ans)
+        return answers
+
+    def terminate(self):
+        if self.alive:
+            self.process.terminate()
+
+    async def close(self):
+        """Terminate GAP and wait until the process and its readers are finished."""
+        self.terminate()
+        if self.process is not None:
+            await self.process.wait()
+        await asyncio.gather(*self._tasks)
+
+
+async def execute_series(requests: list, stop_event=None):
+    session = await GapSession().start()
+    try:
+        return await session.execute(requests, stop_event)
+    finally:
+        await session.close()
+
+
+def gap_execute_commands(requests, stop_event=None):
+    """Executes requests in a new GAP process on a private event loop, so it can be called from any thread."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(execute_series(requests, stop_event))
+    finally:
+        loop.close()
+
+
+class GapSessionPool:
+    """Pool of GAP sessions kept alive between jobs.
+
+    Sessions run on an event loop in a background thread, so execute() can be called from any thread.
+    A session is replaced by a new one if it has died or a request of the job has timed out
+    (GAP is still busy with it then).
+    """
+    reset_commands = ['Reset(GlobalMersenneTwister);', 'Reset(GlobalRandomSource);']
+
+    def __init__(self, size=1):
+        self.size = size
+        self.pid = os.getpid()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._sessions = self._call(self._make_queue())
+        self._closed = False
+        self.latencies = []  # of all requests completed by sessions of the pool
+
+    async def _make_queue(self):
+        queue = asyncio.Queue()
+        for _ in range(self.size):
+            queue.put_nowait(None)  # sessions are started on demand
+        return queue
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _execute(self, requests, stop_event=None):
+        session = await self._sessions.get()
+        try:
+            if session is None or not session.alive:
+                session = await GapSession().start()
+            n_latencies = len(session.communicator.latencies)
+            try:
+                answers = await session.execute(self.reset_commands + list(requests), stop_event)
+            finally:
+                self.latencies.extend(session.communicator.latencies[n_latencies:])
+            answers = answers[len(self.reset_commands):]
+            if any(ans[2].get('timeout') for ans in answers):
+                session.terminate()
+                session = None
+            return answers
+        except BaseException:
+            if session is not None:
+                session.terminate()
+            session = None
+            raise
+        finally:
+            self._sessions.put_nowait(session)
 
-async def execute_series(requests: list):
-    if not isinstance(gap_path, str) and not isinstance(gap_path, bytes):
-        raise ValueError('Invalid path to GAP executable!')
+    def execute(self, requests: list, stop_event=None):
+        """The same as gap_execute_commands(requests, stop_event) but on a warm GAP session."""
+        if self._closed:
+            raise ValueError('The pool is closed.')
+        return self._call(self._execute(requests, stop_event))
 
-    loop = asyncio.get_event_loop()
+    def latency_stats(self) -> dict:
+        return latency_stats(self.latencies)
 
-    p = await asyncio.create_subprocess_exec(
-        gap_path,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE)
+    async def _close(self):
+        for _ in range(self.size):
+            session = await self._sessions.get()
+            if session is not None:
+                await session.close()
 
-    c = Communicator(p)
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._call(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
 
-    loop.create_task(c.process_answers())
-    loop.create_task(c.process_errors())
-    await asyncio.sleep(5)  # to start gap system
+    def __enter__(self):
+        return self
 
-    answers = []
-    for req in requests:
-        if isinstance(req, str):
-            ans = await loop.create_task(c.request(req, listener=ListenerNLines()))
-        elif isinstance(req, tuple):
-            ans = await loop.create_task(c.request(*req, listener=ListenerNLines()))
-        elif isinstance(req, dict):
-            ans = await loop.create_task(c.request(**req))
-        else:
-            raise ValueError('Unknown type of request!')
+    def __exit__(self, *exc):
+        self.close()
 
-        if ans[1] != 'ok':
-            raise Exception(f'Gap communication error {ans}')
-        answers.append(ans)
 
-    p.terminate()
-    return answers
+_default_pool = None
 
 
-def gap_execute_commands(requests):
-    return asyncio.get_event_loop().run_until_complete(execute_series(requests))
+def default_pool() -> GapSessionPool:
+    """Process-wide pool of settings.GAP_POOL_SIZE sessions (each worker process gets its own pool)."""
+    global _default_pool
+    if _default_pool is None or _default_pool.pid != os.getpid():
+        _default_pool = GapSessionPool(settings.GAP_POOL_SIZE)
+        atexit.register(_default_pool.close)
+    return _default_pool
@@ -1,12 +1,19 @@
 import logging
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+from contextlib import nullcontext
 from concurrent.futures.process import ProcessPoolExecutor
 
 from sage import all as sg
-from sage.modules.misc import gram_schmidt
 
 import settings
-from spheres.simplicial_complex import Sphere, BistellarMove
-from spheres.utils import cochain_monomial_to_list, chains_tensor_product
+from spheres.boundary import SimplexIndex
+from spheres.checkpoint import Checkpoint
+from spheres.cocycle_cache import CocycleCache
+from spheres.gap_executor import default_pool
+from spheres import linalg
+from spheres.simplicial_complex import Sphere, BistellarMove, canonical_key, move_from_task, shorten_moves
+from spheres.utils import chains_tensor_product, matrix_to_tensor, sum_of_outer_products, tensor_boundary_0, \
+    tensor_boundary_1, tensor_to_matrix
 
 ChainElement = sg.CombinatorialFreeModule.Element
 
@@ -17,8 +24,9 @@ logger.addHandler(settings.log_handler)
 
 
 class GGCocycleHelper:
-    def __init__(self, bistellar_move: BistellarMove):
+    def __init__(self, bistellar_move: BistellarMove, backend='qq'):
         self.bistellar_move = bistellar_move
+        self.backend = backend  # of linear algebra, see linalg.solver
         self.base_sphere = bistellar_move.skew_suspension()
 
         self.chains0_base = self.base_sphere.n_chains(0, sg.QQ)
@@ -29,33 +37,82 @@ class GGCocycleHelper:
         self.cochains3_base = self.base_sphere.n_chains(3, sg.QQ, cochains=True)
 
         self.chains11 = chains_tensor_product(self.chains1_base, self.chains1_base)
+        self.chains22 = chains_tensor_product(self.chains2_base, self.chains2_base)
+
+        self.simplex_index = SimplexIndex(  # the same order of simplices as in bases of chains
+            self.base_sphere.facets_with_orientation,
+            {k: getattr(self, f'chains{k}_base').get_order() for k in range(4)})
 
         self._link_spheres = dict()
-        self._local_dual_chain = dict()
+        self._local_dual_chain = dict()  # edge -> vector of the dual chain (over the ring of the backend)
+        self._boundaries = dict()
+        self._solvers = dict()
 
         self.eta = self.calc_eta()
-        self.ksi = self.calc_ksi()
+        self.ksi_matrix = self.calc_ksi_matrix()
+        self.ksi = matrix_to_tensor(self.ksi_matrix, self.chains11, self.chains1_base, self.chains1_base)
+
+        self.chain22_matrix = self.product_of_cycles_matrix(self.ksi_matrix)
+        self.ggh = self.calc_ggh_matrix(self.chain22_matrix)
+        if backend not in linalg.EXACT_BACKENDS:
+            self.ggh = linalg.recover_rational(self.ggh, settings.GG_FLOAT_MAX_DENOMINATOR)
 
-        self.chain22 = self.cycle_in_chains11_to_product_of_cycles(self.ksi)
-        self.ggh = self.calc_ggh(self.chain22)
+    @property
+    def chain22(self):
+        return matrix_to_tensor(self.chain22_matrix, self.chains22, self.chains2_base, self.chains2_base)
 
     def calc_ksi(self):
-        ksi = self.chains11.zero()
-        for a, q in self.eta:
-            ksi -= a.tensor(a) * q * 2
-        for a1, q1 in self.eta:
-            for a2, q2 in self.eta:
-                ksi += a1.tensor(a2) * q1 * q2
-        return ksi
+        return matrix_to_tensor(self.calc_ksi_matrix(), self.chains11, self.chains1_base, self.chains1_base)
+
+    def calc_ksi_matrix(self):
+        """ksi = sum(q1 * q2 * a1 (x) a2) - 2 * sum(q * a (x) a) over (a, q) in eta as a |C_1| x |C_1| matrix."""
+        n = len(self.simplex_index.faces[1])
+        vectors = [a.to_vector() for (a, _) in self.eta]
+        coefficients = [q for (_, q) in self.eta]
+        u = sg.matrix(sg.QQ, 1, len(vectors), coefficients, sparse=True) * \
+            sg.matrix(sg.QQ, len(vectors), n, vectors, sparse=True)
+        return u.transpose() * u - 2 * sum_of_outer_products(vectors, coefficients, n)
+
+    def boundary_matrix(self, k):
+        """Sparse boundary matrix of base_sphere over QQ, rows are boundaries of k-simplices."""
+        if k not in self._boundaries:
+            index = self.simplex_index
+            self._boundaries[k] = sg.matrix(sg.QQ, *index.shape(k), index.boundary(k), sparse=True)
+        return self._boundaries[k]
+
+    def boundary_solver(self, k):
+        """Solver of x * d_k = b for the boundary matrix d_k of base_sphere, factored once per helper."""
+        if k not in self._solvers:
+            self._solvers[k] = linalg.solver(self.boundary_matrix(k), self.backend)
+        return self._solvers[k]
+
+    def lift_rows(self, k, x):
+        """Matrix of k-chains whose boundaries are the rows of x, all nonzero rows are lifted by one solve.
+
+        The result is over the ring of the backend (QQ or RDF).
+        """
+        rows = sorted(set(i for (i, _) in x.dict()))
+        if not rows:
+            return sg.matrix(x.base_ring(), x.nrows(), len(self.simplex_index.faces[k]), sparse=True)
+        solution = self.boundary_solver(k).solve(x.matrix_from_rows(rows))
+        res = sg.matrix(solution.base_ring(), x.nrows(), solution.ncols(), sparse=solution.is_sparse())
+        for (i, j), c in solution.dict().items():
+            res[rows[i], j] = c
+        return res
 
     def calc_ggh(self, chain22):
+        return self.calc_ggh_matrix(tensor_to_matrix(chain22, self.chains2_base, self.chains2_base))
+
+    def calc_ggh_matrix(self, chain22):
         logger.info('start')
 
         result = 0
-        for (a, b), c in chain22.monomial_coefficients().items():
-            b_ = self.dualize_cycle(self.chains2_base(b).boundary())
-            ab = self.chains2_base(a).to_vector() * b_.to_vector()
-            result -= ab * c
+        order = self.chains2_base.get_order()
+        columns = sorted(set(j for (_, j) in chain22.dict()))
+        self.dualize_edges(set(e.tuple() for j in columns for e in self.chains2_base(order[j]).boundary().support()))
+        for j in columns:
+            b_ = self.dual_vector(self.chains2_base(order[j]).boundary())
+            result -= chain22.column(j) * b_
         logger.info('finish')
         return result
 
@@ -99,187 +156,369 @@ class GGCocycleHelper:
         return res
 
     def cycle_in_chains11_to_product_of_cycles(self, cycle):
+        cycle = tensor_to_matrix(self.chains11(cycle), self.chains1_base, self.chains1_base)
+        chain22 = self.product_of_cycles_matrix(cycle)
+        return matrix_to_tensor(chain22, self.chains22, self.chains2_base, self.chains2_base)
+
+    def product_of_cycles_matrix(self, cycle):
+        """cycle_in_chains11_to_product_of_cycles for elements of tensor products given as matrices."""
         logger.info('start')
 
-        cycle = self.chains11(cycle)
-        if not self.chains11.boundary_0(cycle) == 0 == self.chains11.boundary_1(cycle):
+        d1 = self.boundary_matrix(1)
+        if not (tensor_boundary_0(cycle, d1).is_zero() and tensor_boundary_1(cycle, d1).is_zero()):
             raise ValueError('Chain is not a (delta0+delta1)-cycle!')
+        d1, d3 = self.boundary_solver(1).d, self.boundary_solver(3).d  # over the ring of the backend
 
-        chains0 = self.chains0_base
-        chains1 = self.chains1_base
-        chains2 = self.chains2_base
-        chains3 = self.chains3_base
-        chains22 = chains_tensor_product(chains2, chains2)
-        chains12 = chains_tensor_product(chains1, chains2)
-        chains03 = chains_tensor_product(chains0, chains3)
-        chains13 = chains_tensor_product(chains1, chains3)
-
-        d1 = sg.matrix([g.boundary().to_vector() for g in chains1.gens()])
-        d2 = sg.matrix([g.boundary().to_vector() for g in chains2.gens()])
-        d3 = sg.matrix([g.boundary().to_vector() for g in chains3.gens()])
-
-        cycle11 = dict()  # cycle11 to dict form
-        for (a, b), c in cycle.monomial_coefficients().items():
-            if a in cycle11:
-                cycle11[a] += chains1(b) * c
-            else:
-                cycle11[a] = chains1(b) * c
-
-        chain12_ = chains12.zero()  # (Id * d2) ^-1 of cycle11
-        for a, c in cycle11.items():
-            a = chains1(a)
-            lift = sg.linear_transformation(d2).lift(c.to_vector())
-            lift = chains2.from_vector(lift)
-            chain12_ += chains12(a.tensor(lift))
-
-        chain02_ = chains12.boundary_0(chain12_)
-
-        chain02 = dict()  # chain02 to dict form
-        for (a, b), c in chain02_.monomial_coefficients().items():
-            if a in chain02:
-                chain02[a] += chains2(b) * c
-            else:
-                chain02[a] = chains2(b) * c
-
-        chain03_ = chains03.zero()  # (Id * d3) ^-1 of chain02
-        for a, c in chain02.items():
-            a = chains0(a)
-            lift = sg.linear_transformation(d3).lift(c.to_vector())
-            lift = chains3.from_vector(lift)
-            chain03_ += chains03(a.tensor(lift))
-
-        chain03 = dict()  # chain03 to dict form
-        for (a, b), c in chain03_.monomial_coefficients().items():
-            if b in chain03:
-                chain03[b] += chains0(a) * c
-            else:
-                chain03[b] = chains0(a) * c
-
-        chain13_ = chains13.zero()  # (d1 * Id) ^-1 of chain03
-        for b, c in chain03.items():
-            b = chains3(b)
-            lift = sg.linear_transformation(d1).lift(c.to_vector())
-            lift = chains1.from_vector(lift)
-            chain13_ += chains13(lift.tensor(b))
-
-        chain12_ -= chains13.boundary_1(chain13_)
-
-        chain12 = dict()  # chain12 to dict form
-        for (a, b), c in chain12_.monomial_coefficients().items():
-            if b in chain12:
-                chain12[b] += chains1(a) * c
-            else:
-                chain12[b] = chains1(a) * c
-
-        chain22_ = chains22.zero()  # (d2 * Id) ^-1 of chain12
-        for b, c in chain12.items():
-            b = chains2(b)
-            lift = sg.linear_transformation(d2).lift(c.to_vector())
-            lift = chains2.from_vector(lift)
-            chain22_ += chains22(lift.tensor(b))
-
-        return chain22_
+        chain12 = self.lift_rows(2, cycle)  # (Id * d2) ^-1 of cycle11
+        chain02 = tensor_boundary_0(chain12, d1)
+        chain03 = self.lift_rows(3, chain02)  # (Id * d3) ^-1 of chain02
+        chain13 = self.lift_rows(1, chain03.transpose()).transpose()  # (d1 * Id) ^-1 of chain03
+        chain12 -= tensor_boundary_1(chain13, d3)
+        return self.lift_rows(2, chain12.transpose()).transpose()  # (d2 * Id) ^-1 of chain12
 
     def dualize_cycle(self, cycle: ChainElement) -> ChainElement:
         """Make a corresponding cycle in barycentric subdivision."""
-        res = self.base_sphere.n_chains(2, sg.QQ, cochains=True).zero()
-        for (k, q) in cycle.monomial_coefficients().items():
-            v1, v2 = k.tuple()
-            if (v1, v2) not in self._local_dual_chain.keys():
-                c1 = self.to_dual_vertices(sg.Simplex([v1])) - self.to_dual_vertices(sg.Simplex([v1, v2]))
-                c2 = self.to_dual_vertices(sg.Simplex([v2])) - self.to_dual_vertices(sg.Simplex([v1, v2]))
-                self._local_dual_chain[(v1, v2)] = (self.l2_minimal_chain(c1, local=[v1]) -
-                                                    self.l2_minimal_chain(c2, local=[v2]))
-            res += self._local_dual_chain[(v1, v2)] * q
-            logger.info([v1, v2])
+        return self.cochains2_base.from_vector(self.dual_vector(cycle))
+
+    def dual_vector(self, cycle: ChainElement):
+        """dualize_cycle(cycle) as a vector over the ring of the backend."""
+        res = 0
+        monomials = cycle.monomial_coefficients()
+        self.dualize_edges([k.tuple() for k in monomials])
+        for (k, q) in monomials.items():
+            res += self._local_dual_chain[k.tuple()] * q
         return res
 
-    def l2_minimal_chain(self, cycle: ChainElement, local=None) -> ChainElement:
-        """Chain with given boundary, minimal by L2 norm."""
-        if local is None or len(local) != 1:
-            raise NotImplemented
+    def dualize_edges(self, edges):
+        """Fills _local_dual_chain for edges (v1, v2), the lifts in the link of each vertex are found as one batch."""
+        edges = [e for e in edges if e not in self._local_dual_chain]
+        cycles = dict()  # v -> [(edge, 0-cycle in the dual of the link of v)]
+        for (v1, v2) in edges:
+            for v in (v1, v2):
+                c = self.to_dual_vertices(sg.Simplex([v])) - self.to_dual_vertices(sg.Simplex([v1, v2]))
+                cycles.setdefault(v, []).append(((v1, v2), c))
+        halves = dict()
+        for v, q in cycles.items():
+            lifts = self.l2_minimal_lifts([c for (_, c) in q], v)
+            for i, (edge, _) in enumerate(q):
+                halves[edge, v] = lifts.row(i)
+        for (v1, v2) in edges:
+            self._local_dual_chain[(v1, v2)] = halves[(v1, v2), v1] - halves[(v1, v2), v2]
+            logger.info([v1, v2])
 
-        v = local[0]
-        sim = sg.Simplex([v])
+    def link_data(self, v):
+        """(lk_sphere, chains0, chains1, solver, embedding) for the link of v.
 
-        if v in self._link_spheres.keys():
-            lk_sphere, chains0, chains1, ker, d1 = self._link_spheres[v]
-        else:
-            lk_sphere = Sphere(self.base_sphere.link_oriented(sim))
+        solver gives L2-minimal lifts along d1 of the link, embedding maps its 1-cochains to 2-cochains of base_sphere.
+        """
+        if v not in self._link_spheres:
+            lk_sphere = Sphere(self.base_sphere.link_oriented(sg.Simplex([v])), validate='cheap')
             chains1 = lk_sphere.n_chains(1, sg.QQ, cochains=True)
             chains0 = lk_sphere.n_chains(2, sg.QQ, cochains=True)
-            d1 = []
-            for g in chains1.gens():
-                d1.append(chains0.zero())
-                for m in g.coboundary().monomials():
-                    m = cochain_monomial_to_list(m)
-                    n = cochain_monomial_to_list(g.monomials()[0])
-                    w = list(set(m) - set(n))[0]
-                    coef = (-1)**(m.index(w) + lk_sphere.check_oriented_facet(m))
-                    d1[-1] += chains0(sg.Simplex(m)) * coef
-                d1[-1] = d1[-1].to_vector()
-            d1 = sg.matrix(d1)
-            ker = d1.left_kernel().basis()
-            ker, _ = gram_schmidt(ker)
-            self._link_spheres[v] = lk_sphere, chains0, chains1, ker, d1
-
-        cycle_in_link = chains0.zero()  # transform chains0 to a (dual) 0-cycle in link of v
-        for (m, c) in cycle.monomial_coefficients().items():
-            m = list(m)
-            # c *= (-1)**self.base_sphere.check_oriented_facet(m)
-            m.remove(v)
-            cycle_in_link += chains0(sg.Simplex(m)) * c
-
-        lift = sg.linear_transformation(d1).lift(cycle_in_link.to_vector())
-
-        for k in ker:
-            if k:
-                lift -= k * (lift * k) / (k * k)
-        chain_in_link = chains1.from_vector(lift)
-        res = self.cochains2_base.zero()
-        for (m, c) in chain_in_link.monomial_coefficients().items():
-            m = list(m)
-            res += self.cochains2_base(sg.Simplex(m + [v])) * c * (-1) ** sorted(m + [v]).index(v)
+            index = SimplexIndex(lk_sphere.facets_with_orientation, {1: chains1.get_order(), 2: chains0.get_order()})
+            signs = [(-1) ** lk_sphere.check_oriented_facet(list(m)) for m in index.faces[2]]
+            d1 = sg.matrix(sg.QQ, len(index.faces[1]), len(index.faces[2]),
+                           {(i, j): c * signs[j] for ((i, j), c) in index.coboundary(1).items()}, sparse=True)
+            solver = linalg.solver(d1, self.backend, minimal_norm=True)
+            embedding = sg.matrix(sg.QQ, len(index.faces[1]), len(self.simplex_index.faces[2]),
+                                  {(i, self.simplex_index[m + (v,)]): (-1) ** sorted(m + (v,)).index(v)
+                                   for (i, m) in enumerate(index.faces[1])}, sparse=True)
+            self._link_spheres[v] = lk_sphere, chains0, chains1, solver, embedding
+        return self._link_spheres[v]
 
-        return res
+    def l2_minimal_chain(self, cycle: ChainElement, local=None) -> ChainElement:
+        """Chain with given boundary, minimal by L2 norm."""
+        if local is None or len(local) != 1:
+            raise NotImplemented
+        return self.l2_minimal_chains([cycle], local[0])[0]
+
+    def l2_minimal_chains(self, cycles, v):
+        """l2_minimal_chain(cycle, local=[v]) for all cycles, with one product by the pseudo-inverse."""
+        lifts = self.l2_minimal_lifts(cycles, v)
+        return [self.cochains2_base.from_vector(lifts.row(i)) for i in range(len(cycles))]
+
+    def l2_minimal_lifts(self, cycles, v):
+        """Matrix with rows l2_minimal_chains(cycles, v) as vectors over the ring of the backend."""
+        lk_sphere, chains0, chains1, solver, embedding = self.link_data(v)
+
+        rhs = []
+        for cycle in cycles:
+            cycle_in_link = chains0.zero()  # transform chains0 to a (dual) 0-cycle in link of v
+            for (m, c) in cycle.monomial_coefficients().items():
+                m = list(m)
+                # c *= (-1)**self.base_sphere.check_oriented_facet(m)
+                m.remove(v)
+                cycle_in_link += chains0(sg.Simplex(m)) * c
+            rhs.append(cycle_in_link.to_vector())
+        if not rhs:
+            return sg.matrix(sg.QQ, 0, embedding.ncols())
+        return solver.solve(rhs) * embedding
 
     def inverse_boundary(self, cycle: ChainElement) -> ChainElement:
         """Find 2-chain with given boundary."""
-        chains2 = self.base_sphere.n_chains(2, sg.QQ)
+        lift = self.lift_rows(2, sg.matrix(sg.QQ, [cycle.to_vector()], sparse=True))
+        return self.chains2_base.from_vector(lift.row(0))
+
+
+def gg_cocycle(bistellar_move: BistellarMove, backend='qq', recheck=False):
+    """GG-cocycle calculation.
+
+    With an inexact backend (float64) and recheck the value is computed again over QQ, and the exact value is returned.
+    It is computed over QQ as well if the inexact backend fails (e.g. the rational value cannot be recovered).
+    """
+    try:
+        ggh = GGCocycleHelper(bistellar_move, backend)
+    except (ArithmeticError, ValueError) as e:
+        if backend in linalg.EXACT_BACKENDS:
+            raise
+        logger.warning(f'{backend} gg_cocycle failed ({e}), the value is computed over QQ')
+        return GGCocycleHelper(bistellar_move).ggh
+    if recheck and backend not in linalg.EXACT_BACKENDS:
+        exact = GGCocycleHelper(bistellar_move).ggh
+        if exact != ggh.ggh:
+            logger.warning(f'{backend} gg_cocycle value {ggh.ggh} differs from the exact value {exact}')
+        return exact
+    return ggh.ggh
 
-        d2 = sg.matrix([g.boundary().to_vector() for g in chains2.gens()])
-        lift = sg.linear_transformation(d2).lift(cycle.to_vector())
-        return chains2.from_vector(lift)
 
+def _canonical_gg_cocycle(task, sign: int, backend='qq', recheck=False):
+    """Runs in workers of gg: the move is built from its compact form (see BistellarMove.link_task)."""
+    return gg_cocycle(move_from_task(task), backend, recheck) * sign
 
-def gg_cocycle(bistellar_move: BistellarMove):
-    """GG-cocycle calculation."""
-    ggh = GGCocycleHelper(bistellar_move)
-    return ggh.ggh
 
+def gg_iter(sphere, max_workers=1, moves=None, path_to_simplex_timeout=20, path_backend='gap', gap_pool=None,
+            path_attempts=1, shorten_path=True, cache=None, linalg_backend='qq', recheck=False, checkpoint=None,
+            executor=None):
+    """Values (move index, vertex, value) of gg_cocycle of links of moves of a path, yielded as soon as they are found.
+
+    See gg for the parameters. checkpoint is a Checkpoint or a path to its file: the path and every value are appended
+    to it, and a later run for the same sphere with moves=None continues the saved path skipping saved values.
+    """
+    for (i, _, v, value) in _gg_values(sphere, max_workers, moves, path_to_simplex_timeout, path_backend, gap_pool,
+                                       path_attempts, shorten_path, cache, linalg_backend, recheck, checkpoint,
+                                       executor):
+        yield i, v, value
 
-def gg(sphere, max_workers=1, moves=None, path_to_simplex_timeout=20, result=None):
+
+def _gg_values(sphere, max_workers, moves, path_to_simplex_timeout, path_backend, gap_pool, path_attempts,
+               shorten_path, cache, linalg_backend, recheck, checkpoint, executor):
+    """gg_iter yielding (move index, position of the vertex in the move, vertex, value)."""
+    if sphere.is_minus_self():
+        return
+
+    if cache is None and settings.GG_CACHE_PATH is not None:
+        cache = settings.GG_CACHE_PATH
+    own_cache = isinstance(cache, str)
+    if own_cache:
+        cache = CocycleCache(cache)
+    own_checkpoint = isinstance(checkpoint, str)
+    if own_checkpoint:
+        checkpoint = Checkpoint(checkpoint)
+
+    try:
+        if moves is None and checkpoint is not None and checkpoint.path(sphere.facets()) is not None:
+            moves = sphere.replay_moves(checkpoint.path(sphere.facets()))
+            logger.info(f'path of {len(moves)} moves from checkpoint')
+        if moves is None:
+            moves = sphere.path_to_simplex(timeout=path_to_simplex_timeout, backend=path_backend, gap_pool=gap_pool,
+                                           attempts=path_attempts, keep='shortest' if path_attempts > 1 else 'first')
+        if shorten_path:
+            moves, report = shorten_moves(moves)
+            logger.info(f'path shortening: {report}')
+        logger.info(f'n_moves: {len(moves)}')
+        logger.info([len(move.vertices()) for move in moves])
+
+        saved = dict()
+        if checkpoint is not None:
+            path = checkpoint.add_path(sphere.facets(), [[move.sigma, move.tau] for move in moves])
+            saved = checkpoint.values(path)
+        store = cache is not None and (linalg_backend in linalg.EXACT_BACKENDS or recheck)
+
+        values = dict()  # canonical key -> value for the canonical orientation
+        waiting = dict()  # future -> (canonical key, [(move index, position, vertex, sign)])
+        futures = dict()  # canonical key -> future
+        n_links = 0
+        with ProcessPoolExecutor(max_workers=max_workers) if executor is None else nullcontext(executor) as executor:
+            for i, move in enumerate(moves):
+                if move.s.is_minus_self():
+                    break
+                vertices = (move.sigma if len(move.sigma) > 1 else []) + (move.tau if len(move.tau) > 1 else [])
+                for j, v in enumerate(vertices):
+                    n_links += 1
+                    if (i, v) in saved:
+                        yield i, j, v, sg.QQ(saved[i, v])
+                        continue
+                    task = move.link_task([v])
+                    key, sign = canonical_key(task[0], task[1:])
+                    if key not in values and key not in futures:
+                        value = None if cache is None else cache.get(key)
+                        if value is None:
+                            futures[key] = executor.submit(_canonical_gg_cocycle, task, sign, linalg_backend, recheck)
+                            waiting[futures[key]] = key, []
+                        else:
+                            values[key] = sg.QQ(value)
+                    if key in values:
+                        if checkpoint is not None:
+                            checkpoint.put(path, i, v, values[key] * sign)
+                        yield i, j, v, values[key] * sign
+                    else:
+                        waiting[futures[key]][1].append((i, j, v, sign))
+
+            for future in as_completed(waiting):
+                key, links = waiting[future]
+                values[key] = future.result()
+                if store:
+                    cache.put(key, str(values[key]))
+                for (i, j, v, sign) in links:
+                    if checkpoint is not None:
+                        checkpoint.put(path, i, v, values[key] * sign)
+                    yield i, j, v, values[key] * sign
+        logger.info(f'gg_cocycle evaluations: {len(futures)} of {n_links} links')
+    finally:
+        if own_cache:
+            cache.close()
+        if own_checkpoint:
+            checkpoint.close()
+
+
+def gg(sphere, max_workers=1, moves=None, path_to_simplex_timeout=20, result=None, path_backend='gap',
+       gap_pool=None, path_attempts=1, shorten_path=True, cache=None, linalg_backend='qq',
+       recheck=False, checkpoint=None, callback=None, executor=None):
+    """Sum of gg_cocycle over links of moves of a path from sphere to the boundary of a simplex.
+
+    Links isomorphic to already evaluated ones are not computed again: values are kept by canonical keys of moves
+    in memory and in cache (a CocycleCache or a path to its file, settings.GG_CACHE_PATH if None).
+    linalg_backend is passed to linalg.solver, all exact backends give the same values. Values of the float64 backend
+    are screening results: they are not stored in cache unless recheck (see gg_cocycle).
+    callback(move index, vertex, value) is called as soon as a value is found, checkpoint is described in gg_iter.
+    executor (a concurrent.futures.Executor, e.g. work_queue.FileQueueExecutor for workers on several nodes) runs
+    gg_cocycle of links, it is left running. A ProcessPoolExecutor with max_workers processes is used if None.
+    With result='all' returns the list of (move index, vertex, value) in the order of the path.
+    """
     if sphere.is_minus_self():
         return 0
-    if moves is None:
-        moves = sphere.path_to_simplex(timeout=path_to_simplex_timeout)
-    logger.info(f'n_moves: {len(moves)}')
-    logger.info([len(move.vertices()) for move in moves])
+
     res = []
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        for i, move in enumerate(moves):
-            if move.s.is_minus_self():
-                break
-            if len(move.sigma) > 1:
-                for v in move.sigma:
-                    ggh = executor.submit(gg_cocycle, move.link([v]))
-                    res.append((i, v, ggh))
-            if len(move.tau) > 1:
-                for v in move.tau:
-                    ggh = executor.submit(gg_cocycle, move.link([v]))
-                    res.append((i, v, ggh))
-
-    res = [(m, v, g.result()) for (m, v, g) in res]
+    for (i, j, v, value) in _gg_values(sphere, max_workers, moves, path_to_simplex_timeout, path_backend, gap_pool,
+                                       path_attempts, shorten_path, cache, linalg_backend, recheck, checkpoint,
+                                       executor):
+        if callback is not None:
+            callback(i, v, value)
+        res.append((i, j, v, value))
+    res = [(i, v, value) for (i, _, v, value) in sorted(res, key=lambda r: r[:2])]
+
     if result == 'all':
         return res
     return sum(ggh[2] for ggh in res)
+
+
+def _path_to_simplex(facets, timeout, backend, attempts):
+    """Runs in workers of gg_many: moves [sigma, tau] of a path from the sphere with oriented facets to a simplex."""
+    sphere = Sphere(facets, validate='none', oriented=True)
+    gap_pool = default_pool() if backend == 'gap' else None  # warm GAP sessions of the worker process
+    moves = sphere.path_to_simplex(timeout=timeout, backend=backend, gap_pool=gap_pool, attempts=attempts,
+                                   keep='shortest' if attempts > 1 else 'first')
+    return [[move.sigma, move.tau] for move in moves]
+
+
+def gg_many(spheres, max_workers=1, path_to_simplex_timeout=20, result=None, path_backend='gap', path_attempts=1,
+            shorten_path=True, cache=None, linalg_backend='qq', recheck=False, executor=None):
+    """Values (index of the sphere, gg(sphere)) for many spheres, yielded as soon as each sphere is finished.
+
+    Path searches and gg_cocycle of links of all spheres are tasks of one executor (see gg), so tasks of different
+    spheres are interleaved, and a value of a link is computed once for all spheres with isomorphic links.
+    With result='all' the value for a sphere is the list of (move index, vertex, value) as in gg.
+    If the path search or a link of a sphere fails, the exception is yielded as its value, other spheres go on.
+    """
+    spheres = list(spheres)
+    if cache is None and settings.GG_CACHE_PATH is not None:
+        cache = settings.GG_CACHE_PATH
+    own_cache = isinstance(cache, str)
+    if own_cache:
+        cache = CocycleCache(cache)
+    store = cache is not None and (linalg_backend in linalg.EXACT_BACKENDS or recheck)
+
+    values = dict()  # canonical key -> value for the canonical orientation
+    futures = dict()  # canonical key -> future
+    waiting = dict()  # future -> ('path', index of the sphere) or ('link', canonical key)
+    links = dict()  # index of the sphere -> [(move index, position, vertex, sign, canonical key)]
+    missing = dict()  # index of the sphere -> canonical keys without values
+    dependents = dict()  # canonical key -> indices of spheres
+
+    def finished(index):
+        res = [(i, v, values[key] * sign) for (i, _, v, sign, key) in sorted(links.pop(index), key=lambda q: q[:2])]
+        del missing[index]
+        return index, res if result == 'all' else sum(ggh[2] for ggh in res)
+
+    def failed(index, error):
+        logger.warning(f'sphere {index} failed: {error!r}')
+        links.pop(index, None)
+        missing.pop(index, None)
+        return index, error
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) if executor is None else nullcontext(executor) as executor:
+            for index, sphere in enumerate(spheres):
+                if sphere.is_minus_self():
+                    yield index, [] if result == 'all' else 0
+                    continue
+                future = executor.submit(_path_to_simplex, sphere.facets_with_orientation, path_to_simplex_timeout,
+                                         path_backend, path_attempts)
+                waiting[future] = 'path', index
+
+            while waiting:
+                done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, x = waiting.pop(future)
+                    if kind == 'link':
+                        del futures[x]
+                        try:
+                            values[x] = future.result()
+                        except Exception as e:
+                            for index in sorted(dependents.pop(x)):
+                                if index in missing:
+                                    yield failed(index, e)
+                            continue
+                        if store:
+                            cache.put(x, str(values[x]))
+                        for index in dependents.pop(x):
+                            if index not in missing:
+                                continue  # the sphere has already failed
+                            missing[index].discard(x)
+                            if not missing[index]:
+                                yield finished(index)
+                    else:
+                        try:
+                            moves = spheres[x].replay_moves(future.result())
+                        except Exception as e:  # e.g. GAP has not found a path in time
+                            yield failed(x, e)
+                            continue
+                        if shorten_path:
+                            moves, report = shorten_moves(moves)
+                            logger.info(f'sphere {x}, path shortening: {report}')
+                        links[x], missing[x] = [], set()
+                        for i, move in enumerate(moves):
+                            if move.s.is_minus_self():
+                                break
+                            vertices = (move.sigma if len(move.sigma) > 1 else []) + \
+                                       (move.tau if len(move.tau) > 1 else [])
+                            for j, v in enumerate(vertices):
+                                task = move.link_task([v])
+                                key, sign = canonical_key(task[0], task[1:])
+                                links[x].append((i, j, v, sign, key))
+                                if key not in values and key not in futures:
+                                    value = None if cache is None else cache.get(key)
+                                    if value is None:
+                                        futures[key] = executor.submit(_canonical_gg_cocycle, task, sign,
+                                                                       linalg_backend, recheck)
+                                        waiting[futures[key]] = 'link', key
+                                    else:
+                                        values[key] = sg.QQ(value)
+                                if key not in values:
+                                    missing[x].add(key)
+                                    dependents.setdefault(key, set()).add(x)
+                        if not missing[x]:
+                            yield finished(x)
+    finally:
+        if own_cache:
+            cache.close()
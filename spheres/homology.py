@@ -0,0 +1,212 @@
+from math import comb
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+from spheres.orientation import ridge_index, orient_facets, permutation_parity
+
+PRIME = 1000003
+
+SparseRow = Dict[int, int]
+
+
+def faces_by_dimension(facets: Sequence[Sequence[int]]) -> List[List[Tuple]]:
+    """All faces of a pure complex on integer vertices, faces[k] is the sorted list of k-faces."""
+    d = len(facets[0]) - 1
+    faces = [set() for _ in range(d + 1)]
+    for f in facets:
+        f = tuple(sorted(f))
+        faces[d].add(f)
+    for k in range(d, 0, -1):
+        for f in faces[k]:
+            for i in range(k + 1):
+                faces[k - 1].add(f[:i] + f[i + 1:])
+    return [sorted(q) for q in faces]
+
+
+def f_vector(faces: List[List[Tuple]]) -> List[int]:
+    return [1] + [len(q) for q in faces]
+
+
+def h_vector(f: List[int]) -> List[int]:
+    """h-vector of a (d-1)-dimensional complex with f-vector f = [1, f_0, ..., f_(d-1)]."""
+    d = len(f) - 1
+    return [sum((-1) ** (k - i) * comb(d - i, k - i) * f[i] for i in range(k + 1)) for k in range(d + 1)]
+
+
+def boundary_rows(faces: List[List[Tuple]], k: int) -> List[SparseRow]:
+    """Rows of the k-th boundary matrix, one row per k-face, columns are indices of (k-1)-faces."""
+    index = {f: i for (i, f) in enumerate(faces[k - 1])}
+    return [{index[f[:i] + f[i + 1:]]: (-1) ** i for i in range(k + 1)} for f in faces[k]]
+
+
+def eliminate(rows: Iterable[SparseRow], modulus: int = 0) -> Tuple[int, List[SparseRow]]:
+    """Sparse elimination by unit pivots.
+
+    With modulus=p every nonzero entry is a unit of GF(p), the residual is empty and the rank mod p is returned.
+    With modulus=0 only entries +-1 are used as pivots, so the Smith normal form of the matrix is that of the
+    residual plus the returned number of ones.
+    """
+    rows = {i: dict(r) for (i, r) in enumerate(rows) if r}
+    columns = dict()
+    for i, r in rows.items():
+        for c in r:
+            columns.setdefault(c, set()).add(i)
+
+    def is_unit(x):
+        return x % modulus != 0 if modulus else abs(x) == 1
+
+    rank = 0
+    progress = True
+    while progress:
+        progress = False
+        for i in sorted(rows, key=lambda j: len(rows[j])):
+            if i not in rows:
+                continue
+            r = rows[i]
+            units = [c for c in r if is_unit(r[c])]
+            if not units:
+                continue
+            c = min(units, key=lambda q: len(columns[q]))
+            inv = pow(r[c], -1, modulus) if modulus else r[c]
+            for j in list(columns[c]):
+                if j == i:
+                    continue
+                r2 = rows[j]
+                factor = r2[c] * inv
+                for c2, x in r.items():
+                    y = r2.get(c2, 0) - factor * x
+                    if modulus:
+                        y %= modulus
+                    if y:
+                        if c2 not in r2:
+                            columns[c2].add(j)
+                        r2[c2] = y
+                    elif c2 in r2:
+                        del r2[c2]
+                        columns[c2].discard(j)
+                if not r2:
+                    del rows[j]
+            for c2 in r:
+                columns[c2].discard(i)
+            del rows[i]
+            rank += 1
+            progress = True
+    return rank, list(rows.values())
+
+
+def elementary_divisors(rows: List[SparseRow]) -> List[int]:
+    """Nonzero elementary divisors of a small integer matrix given by sparse rows."""
+    cols = sorted(set(c for r in rows for c in r))
+    position = {c: i for (i, c) in enumerate(cols)}
+    m = [[0] * len(cols) for _ in rows]
+    for i, r in enumerate(rows):
+        for c, x in r.items():
+            m[i][position[c]] = x
+
+    res = []
+    while m and m[0]:
+        entries = [(abs(x), i, j) for (i, row) in enumerate(m) for (j, x) in enumerate(row) if x]
+        if not entries:
+            break
+        _, i, j = min(entries)
+        m[0], m[i] = m[i], m[0]
+        for row in m:
+            row[0], row[j] = row[j], row[0]
+        while True:
+            p = m[0][0]
+            changed = False
+            for i in range(1, len(m)):  # clear the first column
+                q = m[i][0] // p
+                if q:
+                    m[i] = [a - q * b for (a, b) in zip(m[i], m[0])]
+                if m[i][0]:
+                    changed = True
+            for j in range(1, len(m[0])):  # clear the first row
+                q = m[0][j] // p
+                if q:
+                    for row in m:
+                        row[j] -= q * row[0]
+                if m[0][j]:
+                    changed = True
+            if not changed:
+                rest = [x for row in m[1:] for x in row[1:] if x % p]
+                if not rest:
+                    break
+                i = next(i for i in range(1, len(m)) if any(x % p for x in m[i][1:]))
+                m[0] = [a + b for (a, b) in zip(m[0], m[i])]
+                continue
+            entries = [(abs(m[i][0]), i, 0) for i in range(len(m)) if m[i][0]] + \
+                      [(abs(m[0][j]), 0, j) for j in range(len(m[0])) if m[0][j]]
+            _, i, j = min(entries)
+            m[0], m[i] = m[i], m[0]
+            for row in m:
+                row[0], row[j] = row[j], row[0]
+        res.append(abs(m[0][0]))
+        m = [row[1:] for row in m[1:]]
+    return sorted(res)
+
+
+def is_consistently_oriented(oriented_facets: List[List[Hashable]]) -> bool:
+    """Checks that neighbouring oriented facets induce opposite orientations on their common ridge."""
+    for ridge, neighbours in ridge_index(oriented_facets).items():
+        f, g = (oriented_facets[i] for i in neighbours)
+        k = next(i for (i, v) in enumerate(f) if v not in ridge)
+        m = next(i for (i, v) in enumerate(g) if v not in ridge)
+        rf = [v for v in f if v in ridge]
+        rg = [v for v in g if v in ridge]
+        if (k + m + permutation_parity(rf, rg)) % 2 == 0:
+            return False
+    return True
+
+
+def is_homology_sphere(facets: Iterable[Iterable[Hashable]], prime: int = PRIME) -> bool:
+    """Checks if a pure complex given by facets is a pseudomanifold with homology of a sphere.
+
+    Cheap invariants (pseudomanifold, strong connectivity, orientability, Euler characteristic,
+    Dehn-Sommerville relations valid for homology manifolds) go first, then ranks of boundary
+    matrices over GF(prime). The integral torsion check runs only in dimensions >= 3, where the
+    middle homology groups can have torsion.
+    """
+    facets = [list(f) for f in facets]
+    if not facets or not facets[0]:
+        raise ValueError
+    d = len(facets[0]) - 1
+    if any(len(f) != d + 1 or len(set(f)) != d + 1 for f in facets):
+        return False
+    if len(set(frozenset(f) for f in facets)) != len(facets):
+        return False
+
+    vertices = dict()
+    for f in facets:
+        for v in f:
+            vertices.setdefault(v, len(vertices))
+    facets = [[vertices[v] for v in f] for f in facets]
+
+    if d == 0:
+        return len(facets) == 2
+    if any(len(q) != 2 for q in ridge_index(facets).values()):
+        return False
+    oriented = orient_facets(facets, facets[0])
+    if len(oriented) != len(facets):  # not strongly connected
+        return False
+    if not is_consistently_oriented(oriented):
+        return False
+
+    faces = faces_by_dimension(facets)
+    f = f_vector(faces)
+    if sum((-1) ** i * x for (i, x) in enumerate(f[1:])) != 1 + (-1) ** d:
+        return False
+    h = h_vector(f)
+    if h != h[::-1]:
+        return False
+
+    # rank d_1 = f_0 - 1 (connected) and rank d_d = f_d - 1 (orientable) are known,
+    # so reduced Betti numbers vanish iff the ranks of d_2, ..., d_(d-1) are as for a sphere
+    ranks = [0, f[1] - 1] + [eliminate(boundary_rows(faces, k), prime)[0] for k in range(2, d)] + [f[d + 1] - 1, 0]
+    if any(f[k + 1] - ranks[k] - ranks[k + 1] != 0 for k in range(1, d)):
+        return False
+
+    for k in range(2, d):
+        _, residual = eliminate(boundary_rows(faces, k))
+        if residual and any(x != 1 for x in elementary_divisors(residual)):
+            return False
+    return True
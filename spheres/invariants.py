@@ -0,0 +1,61 @@
+"""Memoization of expensive invariants of immutable objects (spheres), shared between isomorphic objects."""
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import settings
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Mapping of bounded size, the least recently used items are evicted first."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return key in self._data
+
+    def get(self, key: Hashable, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def __setitem__(self, key: Hashable, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+shared_invariants = LRUCache(settings.INVARIANTS_CACHE_SIZE)  # (canonical key, name) -> value
+
+
+def memoized(obj, name: str, compute: Callable, shared: bool = True):
+    """Value of the invariant name of obj, compute() is called only once.
+
+    The value is kept on obj, and with shared=True also in shared_invariants by obj.canonical_key(),
+    so it is reused by isomorphic objects. Only values not depending on labels of vertices may be shared.
+    """
+    values = obj.__dict__.setdefault('_invariants', dict())
+    value = values.get(name, _MISSING)
+    if value is not _MISSING:
+        return value
+    key = None
+    if shared:
+        key = obj.canonical_key()[0], name
+        value = shared_invariants.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        if key is not None:
+            shared_invariants[key] = value
+    values[name] = value
+    return value
@@ -0,0 +1,279 @@
+"""Linear algebra over QQ with a matrix factored once and used for many right-hand sides.
+
+Backends (see solver): 'qq' computes over QQ, 'modular' computes modulo word-size primes and recovers the same
+rational matrices by CRT and rational reconstruction, every recovered result is verified exactly.
+'float64' computes with numpy in double precision, its results are approximate (see recover_rational).
+"""
+from fractions import Fraction
+
+import numpy as np
+from sage import all as sg
+
+BACKENDS = ['qq', 'modular', 'float64']
+EXACT_BACKENDS = ['qq', 'modular']
+MAX_PRIMES = 1000  # primes tried by modular computations before giving up
+FLOAT_TOLERANCE = 1e-9  # relative error of results of the float64 backend
+
+
+class LeftSolver:
+    """Solutions x of x * d = b for many b with one factorization of d.
+
+    The solutions are the same as sg.linear_transformation(d).lift(b): x is supported on the first linearly
+    independent rows of d (the pivots of d^T), so results do not change when lifts are batched.
+    """
+    def __init__(self, d):
+        self.d = sg.matrix(sg.QQ, d, sparse=True)
+        self.rows = self.d.transpose().pivots()
+        d_rows = self.d.matrix_from_rows(self.rows)
+        self.columns = d_rows.pivots()
+        self._inverse = d_rows.matrix_from_columns(self.columns).inverse()  # rank x rank
+
+    def _lift_matrix(self, inverse):
+        """Matrix l with b * l = x for b in the image of d, built from the inverse of d[rows][:, columns]."""
+        lift = sg.matrix(inverse.base_ring(), self.d.ncols(), self.d.nrows(), sparse=True)
+        for (i, j), c in inverse.dict().items():
+            lift[self.columns[i], self.rows[j]] = c
+        return lift
+
+    def solve(self, b):
+        """Matrix x with x * d = b for a matrix b (one right-hand side per row)."""
+        b = sg.matrix(sg.QQ, b, sparse=True)
+        x = sg.matrix(sg.QQ, b.nrows(), self.d.nrows(), sparse=True)
+        if self.rows:
+            x_rows = self._solve_rows(b.matrix_from_columns(self.columns))
+            for (i, j), c in x_rows.dict().items():
+                x[i, self.rows[j]] = c
+        if x * self.d != b:
+            raise ValueError('matrix equation has no solutions')
+        return x
+
+    def _solve_rows(self, b_columns):
+        """Rows of x on the pivots, b_columns = b[:, columns]."""
+        return b_columns * self._inverse
+
+    def lift(self, b):
+        """Vector x with x * d = b."""
+        return self.solve([b]).row(0).dense_vector()
+
+
+class MinimalNormSolver(LeftSolver):
+    """Solutions x of x * d = b minimal by L2 norm, x = b * pseudo_inverse for all b at once.
+
+    pseudo_inverse is the lift of LeftSolver followed by the orthogonal projection along the left kernel of d,
+    so it is computed exactly over QQ once per matrix.
+    """
+    def __init__(self, d):
+        super().__init__(d)
+        self.pseudo_inverse = _minimal_norm(self.d, self._lift_matrix(self._inverse))
+
+    def solve(self, b):
+        """Matrix x with x * d = b for a matrix b (one right-hand side per row), rows of x are L2-minimal."""
+        b = sg.matrix(sg.QQ, b, sparse=True)
+        x = b * self.pseudo_inverse
+        if x * self.d != b:
+            raise ValueError('matrix equation has no solutions')
+        return x
+
+
+def _minimal_norm(d, lift):
+    """lift followed by the orthogonal projection along the left kernel of d."""
+    k = d.left_kernel().basis_matrix()
+    if k.nrows():
+        lift = lift - lift * k.transpose() * (k * k.transpose()).inverse() * k
+    return lift
+
+
+def _primes(start: int = 2 ** 31):
+    p = start
+    for _ in range(MAX_PRIMES):
+        p = sg.previous_prime(p)
+        yield p
+    raise ArithmeticError('modular computation does not converge')
+
+
+def _mod(x, p):
+    """Matrix x over GF(p), None if p divides a denominator."""
+    try:
+        return x.change_ring(sg.GF(p))
+    except ZeroDivisionError:
+        return None
+
+
+def _crt(a, m, a_p, p):
+    """Integer matrix equal to a modulo m and to a_p (a matrix over GF(p)) modulo p."""
+    t = (a_p - a.change_ring(a_p.base_ring())) * (1 / a_p.base_ring()(m))
+    return a + m * t.change_ring(sg.ZZ)
+
+
+def _rational_reconstruction(a, m):
+    """Matrix over QQ equal to the integer matrix a modulo m, None if some entry has no reconstruction."""
+    try:
+        entries = {ij: sg.rational_reconstruction(c, m) for (ij, c) in a.dict().items()}
+    except ArithmeticError:
+        return None
+    return sg.matrix(sg.QQ, a.nrows(), a.ncols(), entries, sparse=True)
+
+
+def modular_matrix(compute, check, primes):
+    """Rational matrix x with check(x) from compute(p), the reductions of x modulo primes p.
+
+    compute(p) returns None for unlucky primes. The reductions are combined by CRT until the rational reconstruction
+    stops changing with one more prime, only then it is verified by check (exact, so it is done as rarely as possible).
+    The result is exact whenever check characterizes x.
+    """
+    a, m, previous = None, 1, None
+    for p in primes:
+        x_p = compute(p)
+        if x_p is None:
+            continue
+        a = x_p.change_ring(sg.ZZ) if a is None else _crt(a, m, x_p, p)
+        m *= p
+        x = _rational_reconstruction(a, m)
+        if x is not None and x == previous and check(x):
+            return x
+        previous = x
+
+
+class ModularLeftSolver(LeftSolver):
+    """LeftSolver with pivots, the inverse of d[rows][:, columns] and the solutions found modulo primes.
+
+    The pivots modulo a prime are certified to be the pivots over QQ: every row of d is a combination of earlier
+    pivot rows. So the solutions are identical to those of LeftSolver.
+    """
+    def __init__(self, d):
+        self.d = sg.matrix(sg.QQ, d, sparse=True)
+        self._inverses_mod = dict()  # p -> the inverse modulo p (None if p divides its denominators)
+        for p in _primes():
+            d_p = _mod(self.d, p)
+            if d_p is None:
+                continue
+            self.rows, self.columns = _pivots(d_p)
+            self._s = self.d.matrix_from_rows_and_columns(self.rows, self.columns)
+            inverse = modular_matrix(lambda q: _inverse_mod(self._s, q), lambda x: self._s * x == 1, _primes())
+            if self._are_pivots(inverse):
+                self._inverse = inverse
+                return
+
+    def _solve_rows(self, b_columns):
+        """Rows of x on the pivots modulo primes, checked by x_rows * d[rows][:, columns] == b_columns."""
+        return modular_matrix(lambda p: self._solve_rows_mod(b_columns, p), lambda x: x * self._s == b_columns,
+                              _primes())
+
+    def _solve_rows_mod(self, b_columns, p):
+        if p not in self._inverses_mod:
+            self._inverses_mod[p] = _mod(self._inverse, p)
+        b_p, inverse_p = _mod(b_columns, p), self._inverses_mod[p]
+        if b_p is None or inverse_p is None:
+            return None
+        return b_p * inverse_p
+
+    def _are_pivots(self, inverse) -> bool:
+        c = self.d.matrix_from_columns(self.columns) * inverse  # rows of d in terms of pivot rows
+        return all(self.rows[j] <= i for (i, j) in c.dict()) and c * self.d.matrix_from_rows(self.rows) == self.d
+
+
+def _pivots(d):
+    """Pivots of d^T (the first independent rows of d) and pivots of these rows."""
+    rows = d.transpose().pivots()
+    return rows, d.matrix_from_rows(rows).pivots()
+
+
+def _inverse_mod(s, p):
+    s_p = _mod(s, p)
+    if s_p is None or not s_p.is_invertible():
+        return None
+    return s_p.inverse()
+
+
+class ModularMinimalNormSolver(ModularLeftSolver, MinimalNormSolver):
+    """MinimalNormSolver with the pseudo-inverse found modulo primes and checked by d * x * d == d, d * x symmetric."""
+    def __init__(self, d):
+        super().__init__(d)
+        self.pseudo_inverse = modular_matrix(self._pseudo_inverse_mod, self._is_pseudo_inverse, _primes())
+
+    def _pseudo_inverse_mod(self, p):
+        d_p, inverse_p = _mod(self.d, p), _mod(self._inverse, p)
+        if d_p is None or inverse_p is None or d_p.rank() != len(self.rows):
+            return None
+        try:
+            return _minimal_norm(d_p, self._lift_matrix(inverse_p))
+        except ZeroDivisionError:  # the kernel is isotropic modulo p
+            return None
+
+    def _is_pseudo_inverse(self, x) -> bool:
+        dx = self.d * x
+        return dx * self.d == self.d and dx.is_symmetric()
+
+
+class FloatLeftSolver:
+    """LeftSolver in float64: x * d = b is solved on the same pivots, results are dense matrices over RDF.
+
+    The pivots are found modulo a large prime, they are the pivots over QQ unless the prime divides some minor of d.
+    """
+    def __init__(self, d):
+        d = sg.matrix(sg.QQ, d, sparse=True)
+        self.d = sg.matrix(sg.RDF, d, sparse=False)
+        self.rows, self.columns = [], []
+        for p in _primes():
+            d_p = _mod(d, p)
+            if d_p is not None:
+                self.rows, self.columns = map(list, _pivots(d_p))
+                break
+        self._d = self.d.numpy()
+        self._inverse = np.linalg.inv(self._d[np.ix_(self.rows, self.columns)])
+
+    def _solve(self, b):
+        x = np.zeros((b.shape[0], self._d.shape[0]))
+        x[:, self.rows] = b[:, self.columns] @ self._inverse
+        return x
+
+    def solve(self, b):
+        """Matrix x with x * d = b (up to FLOAT_TOLERANCE) for a matrix b (one right-hand side per row)."""
+        b = sg.matrix(sg.RDF, b, sparse=False).numpy()
+        x = self._solve(b)
+        if np.abs(x @ self._d - b).max(initial=0) > FLOAT_TOLERANCE * max(1, np.abs(b).max(initial=0)):
+            raise ValueError('matrix equation has no solutions')
+        return sg.matrix(sg.RDF, x)
+
+    def lift(self, b):
+        """Vector x with x * d = b."""
+        return self.solve([b]).row(0)
+
+
+class FloatMinimalNormSolver(FloatLeftSolver):
+    """MinimalNormSolver in float64, with the Moore-Penrose pseudo-inverse of numpy."""
+    def __init__(self, d):
+        self.d = sg.matrix(sg.RDF, sg.matrix(sg.QQ, d, sparse=True), sparse=False)
+        self._d = self.d.numpy()
+        self.pseudo_inverse = np.linalg.pinv(self._d)
+
+    def _solve(self, b):
+        return b @ self.pseudo_inverse
+
+
+def recover_rational(x: float, max_denominator: int):
+    """The rational closest to x with denominator at most max_denominator (by continued fractions).
+
+    Raises ArithmeticError if it differs from x by more than FLOAT_TOLERANCE, or if the recovery is ambiguous:
+    rationals with such denominators are 1 / max_denominator^2 apart, so several of them may be within the tolerance.
+    """
+    x = float(x)
+    tolerance = FLOAT_TOLERANCE * max(1, abs(x))
+    if 2 * tolerance * max_denominator ** 2 >= 1:
+        raise ArithmeticError(f'rational numbers with denominator at most {max_denominator} near {x} '
+                              f'are not determined in float64')
+    q = Fraction(x).limit_denominator(max_denominator)
+    if abs(x - q) > tolerance:
+        raise ArithmeticError(f'no rational number with denominator at most {max_denominator} near {x}')
+    return sg.QQ(q)
+
+
+def solver(d, backend: str = 'qq', minimal_norm: bool = False):
+    """Solver of x * d = b with the given backend, with L2-minimal solutions if minimal_norm."""
+    if backend == 'qq':
+        return MinimalNormSolver(d) if minimal_norm else LeftSolver(d)
+    if backend == 'modular':
+        return ModularMinimalNormSolver(d) if minimal_norm else ModularLeftSolver(d)
+    if backend == 'float64':
+        return FloatMinimalNormSolver(d) if minimal_norm else FloatLeftSolver(d)
+    raise ValueError(f'Unknown backend {backend}!')
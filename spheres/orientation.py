@@ -0,0 +1,161 @@
+from collections import deque
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Sequence
+
+
+def ridge_index(facets: Iterable[Iterable[Hashable]]) -> Dict[FrozenSet, List[int]]:
+    """Map every ridge (codimension one face) to the indices of facets containing it."""
+    index = dict()
+    for i, f in enumerate(facets):
+        f = frozenset(f)
+        for v in f:
+            index.setdefault(f - {v}, []).append(i)
+    return index
+
+
+def orient_facets(facets: Sequence[Iterable[Hashable]], oriented_facet: Sequence[Hashable]) -> List[List]:
+    """Orient a pseudomanifold by BFS over the ridge index starting from oriented_facet.
+
+    Neighbouring facet is obtained from an oriented facet by replacing the opposite vertex
+    and changing the orientation, so every facet is visited once and every ridge twice.
+    """
+    facets = [frozenset(f) for f in facets]
+    index = ridge_index(facets)
+    position = {f: i for (i, f) in enumerate(facets)}
+    start = frozenset(oriented_facet)
+    if start not in position:
+        raise ValueError('Not a facet!')
+
+    oriented = [None] * len(facets)
+    oriented[position[start]] = list(oriented_facet)
+    order = [list(oriented_facet)]
+    queue = deque([position[start]])
+    while queue:
+        i = queue.popleft()
+        f = oriented[i]
+        for k, v in enumerate(f):
+            neighbours = index[facets[i] - {v}]
+            if len(neighbours) != 2:
+                raise ValueError('Complex is not a pseudomanifold!')
+            j = neighbours[0] if neighbours[1] == i else neighbours[1]
+            if oriented[j] is not None:
+                continue
+            w, = facets[j] - facets[i]
+            neg = f[:k] + [w] + f[k + 1:]
+            oriented[j] = neg[:-2] + neg[-2:][::-1]
+            order.append(oriented[j])
+            queue.append(j)
+    return order
+
+
+def permutation_parity(seq: Sequence[Hashable], reference: Sequence[Hashable]) -> int:
+    """Parity (0 for even, 1 for odd) of the permutation taking reference to seq."""
+    position = {v: i for (i, v) in enumerate(reference)}
+    if len(position) != len(seq) or any(v not in position for v in seq):
+        raise ValueError('Sequences are not permutations of each other!')
+    perm = [position[v] for v in seq]
+    parity = 0
+    visited = [False] * len(perm)
+    for i in range(len(perm)):
+        if visited[i]:
+            continue
+        j = i
+        while not visited[j]:
+            visited[j] = True
+            j = perm[j]
+            parity ^= 1
+        parity ^= 1  # a cycle of length k is a product of k - 1 transpositions
+    return parity
+
+
+def oriented_move_facets(star: Sequence[Sequence[Hashable]], sigma: Sequence[Hashable],
+                         tau: Sequence[Hashable]) -> List[List]:
+    """Facets tau + (sigma - x) replacing the oriented facets star of sigma in the bistellar move sigma -> tau.
+
+    They are oriented consistently with the facets outside the star.
+    """
+    f0 = list(star[0])
+    w0, = set(tau) - set(f0)
+    simplex = [w0] + f0  # its boundary contains f0 with the positive orientation
+    new = []
+    for x in sigma:
+        i = simplex.index(x)
+        f = simplex[:i] + simplex[i + 1:]
+        new.append(f[:-2] + f[-2:][::-1] if i % 2 == 0 and len(f) >= 2 else f)
+    return new
+
+
+class OrientedFacetIndex:
+    """Oriented facets of a pseudomanifold hashed by their vertex sets."""
+    def __init__(self, oriented_facets: Iterable[Sequence[Hashable]]):
+        self._facets = {frozenset(f): tuple(f) for f in oriented_facets}
+        self._stars = None
+
+    def __len__(self):
+        return len(self._facets)
+
+    def __contains__(self, f):
+        return frozenset(f) in self._facets
+
+    def __getitem__(self, f) -> tuple:
+        try:
+            return self._facets[frozenset(f)]
+        except KeyError:
+            raise ValueError('Not a facet!')
+
+    def is_oriented(self, f: Sequence[Hashable]) -> bool:
+        """Checks if f is a facet taken with its positive orientation."""
+        return not permutation_parity(f, self[f])
+
+    def are_oriented(self, facets: Iterable[Sequence[Hashable]]) -> List[bool]:
+        """Batch version of is_oriented."""
+        return [self.is_oriented(f) for f in facets]
+
+    def moved(self, removed: Iterable[Sequence[Hashable]], added: Iterable[Sequence[Hashable]]) \
+            -> 'OrientedFacetIndex':
+        """Index with facets removed replaced by oriented facets added (e.g. after a bistellar move).
+
+        Only stars of the vertices of changed facets are rebuilt, the rest is shared with self.
+        """
+        removed = [self[f] for f in removed]
+        added = [tuple(f) for f in added]
+        res = OrientedFacetIndex([])
+        res._facets = self._facets.copy()
+        for f in removed:
+            del res._facets[frozenset(f)]
+        for f in added:
+            res._facets[frozenset(f)] = f
+        if self._stars is not None:
+            res._stars = self._stars.copy()
+            dropped = set(removed)
+            for v in set().union(*removed, *added):
+                star = [f for f in res._stars.get(v, []) if f not in dropped] + [f for f in added if v in f]
+                if star:
+                    res._stars[v] = star
+                else:
+                    res._stars.pop(v, None)
+        return res
+
+    def star(self, simplex: Iterable[Hashable]) -> List[tuple]:
+        """Oriented facets containing the simplex."""
+        simplex = frozenset(simplex)
+        if self._stars is None:
+            self._stars = dict()
+            for k, f in self._facets.items():
+                for v in k:
+                    self._stars.setdefault(v, []).append(f)
+        if not simplex:
+            return list(self._facets.values())
+        v = next(iter(simplex))
+        return [f for f in self._stars.get(v, []) if simplex.issubset(f)]
+
+    def link(self, simplex: Sequence[Hashable]) -> List[List]:
+        """Facets s of the link of simplex oriented so that s + simplex is an oriented facet."""
+        simplex = list(simplex)
+        vertices = set(simplex)
+        res = []
+        for f in self.star(simplex):
+            s = [v for v in f if v not in vertices]
+            if permutation_parity(s + simplex, f) and len(s) >= 2:
+                s = s[:-2] + s[-2:][::-1]
+            res.append(s)
+        return res
@@ -0,0 +1,181 @@
+from typing import Hashable, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from spheres.orientation import orient_facets, oriented_move_facets, permutation_parity
+
+
+def ridge_adjacency(facets: np.ndarray) -> np.ndarray:
+    """adjacency[i, k] is the facet sharing with facet i the ridge opposite to its k-th vertex."""
+    n_facets, n = facets.shape
+    if n == 1:
+        if n_facets != 2:
+            raise ValueError('Complex is not a pseudomanifold!')
+        return np.array([[1], [0]], dtype=np.int32)
+    ridges = np.sort(np.stack([np.delete(facets, k, axis=1) for k in range(n)], axis=1), axis=2)
+    ridges = ridges.reshape(n_facets * n, n - 1)
+    order = np.lexsort(ridges.T[::-1])
+    same = np.all(ridges[order[1:]] == ridges[order[:-1]], axis=1)
+    if len(order) % 2 or not same[0::2].all() or same[1::2].any():
+        raise ValueError('Complex is not a pseudomanifold!')
+    adjacency = np.empty(n_facets * n, dtype=np.int32)
+    adjacency[order[0::2]] = order[1::2] // n
+    adjacency[order[1::2]] = order[0::2] // n
+    return adjacency.reshape(n_facets, n)
+
+
+def _change_orientation(f: List) -> List:
+    return f[:-2] + f[-2:][::-1] if len(f) >= 2 else f
+
+
+class OrientedSphere:
+    """Compact oriented sphere: facets are rows of an int32 array of vertex ids in oriented order.
+
+    Vertex labels are kept in a separate table, so the object is cheap to store, copy and pickle.
+    Sphere keeps one as its compact core (Sphere.compact): orientation, links, bistellar moves and skew suspensions
+    are computed here without sage objects.
+    """
+    def __init__(self, facets: np.ndarray, labels: Sequence[Hashable]):
+        self.facets = np.ascontiguousarray(facets, dtype=np.int32)
+        self.labels = list(labels)
+        self._ids = None
+        self._adjacency = None
+        self._rows = None
+
+    @classmethod
+    def from_oriented_facets(cls, oriented_facets: Iterable[Sequence[Hashable]]) -> 'OrientedSphere':
+        """Take facets as they are, they should be consistently oriented."""
+        oriented_facets = [list(f) for f in oriented_facets]
+        ids = dict()
+        for f in oriented_facets:
+            for v in f:
+                ids.setdefault(v, len(ids))
+        facets = np.array([[ids[v] for v in f] for f in oriented_facets], dtype=np.int32)
+        return cls(facets, list(ids))
+
+    @classmethod
+    def from_facets(cls, facets: Sequence[Sequence[Hashable]], oriented_facet=None) -> 'OrientedSphere':
+        """Orient facets starting from oriented_facet (the first facet by default)."""
+        facets = [list(f) for f in facets]
+        return cls.from_oriented_facets(orient_facets(facets, facets[0] if oriented_facet is None else oriented_facet))
+
+    @classmethod
+    def from_sphere(cls, sphere) -> 'OrientedSphere':
+        return cls.from_oriented_facets(sphere.facets_with_orientation)
+
+    def to_sphere(self, validate: str = 'none'):
+        """Sphere with the same oriented facets, self becomes its compact core."""
+        from spheres.simplicial_complex import Sphere
+        res = Sphere(self.oriented_facets(), validate=validate, oriented=True)
+        res._compact = self
+        return res
+
+    def __getstate__(self):
+        return {'facets': self.facets, 'labels': self.labels}
+
+    def __setstate__(self, state):
+        self.__init__(state['facets'], state['labels'])
+
+    def __len__(self):
+        return len(self.facets)
+
+    def dimension(self) -> int:
+        return self.facets.shape[1] - 1
+
+    def vertices(self) -> List[Hashable]:
+        return [self.labels[i] for i in np.unique(self.facets)]
+
+    def oriented_facets(self) -> List[List]:
+        labels = self.labels
+        return [[labels[i] for i in f] for f in self.facets.tolist()]
+
+    def ids(self, simplex: Iterable[Hashable]) -> List[int]:
+        if self._ids is None:
+            self._ids = {v: i for (i, v) in enumerate(self.labels)}
+        try:
+            return [self._ids[v] for v in simplex]
+        except KeyError:
+            raise ValueError('Unknown vertex!')
+
+    @property
+    def adjacency(self) -> np.ndarray:
+        """Ridge adjacency of facets, built on the first use."""
+        if self._adjacency is None:
+            self._adjacency = ridge_adjacency(self.facets)
+        return self._adjacency
+
+    def row(self, f: Iterable[Hashable]) -> int:
+        """Index of the facet with given vertices."""
+        if self._rows is None:
+            self._rows = {frozenset(f): i for (i, f) in enumerate(self.facets.tolist())}
+        try:
+            return self._rows[frozenset(self.ids(f))]
+        except (KeyError, ValueError):
+            raise ValueError('Not a facet!')
+
+    def check_oriented_facet(self, f: Sequence[Hashable]) -> bool:
+        return not permutation_parity(self.ids(f), self.facets[self.row(f)].tolist())
+
+    def star_rows(self, simplex: Iterable[Hashable]) -> np.ndarray:
+        """Indices of facets containing the simplex, there are none if some of its vertices is not in the sphere."""
+        try:
+            simplex_ids = self.ids(simplex)
+        except ValueError:
+            return np.zeros(0, dtype=np.int64)
+        mask = np.ones(len(self.facets), dtype=bool)
+        for v in simplex_ids:
+            mask &= (self.facets == v).any(axis=1)
+        return np.flatnonzero(mask)
+
+    def link_oriented(self, simplex: Sequence[Hashable]) -> 'OrientedSphere':
+        """Link of a simplex with orientation such that s + simplex is an oriented facet for every facet s."""
+        rows = self.star_rows(simplex)
+        if not len(rows):
+            return OrientedSphere(np.zeros((0, len(self.facets[0]) - len(simplex))), [])
+        simplex_ids = self.ids(simplex)
+        res = []
+        for f in self.facets[rows].tolist():
+            s = [v for v in f if v not in simplex_ids]
+            if permutation_parity(s + simplex_ids, f):
+                s = _change_orientation(s)
+            res.append(s)
+        res = np.array(res, dtype=np.int32).reshape(len(res), len(self.facets[0]) - len(simplex_ids))
+        used = np.unique(res)
+        return OrientedSphere(np.searchsorted(used, res), [self.labels[i] for i in used])
+
+    def bistellar_move(self, sigma: Sequence[Hashable], new_vertex_name=None) -> Tuple[List, 'OrientedSphere']:
+        """Apply a bistellar move to the star of sigma, returns tau and the resulting sphere."""
+        d = self.dimension()
+        sigma_ids = self.ids(sigma)
+        rows = self.star_rows(sigma)
+        star = self.facets[rows]
+        vertices = set(np.unique(star).tolist())
+        labels = self.labels
+        if len(vertices) == d + 2:
+            tau_ids = sorted(vertices - set(sigma_ids))
+            if len(rows) != len(tau_ids) or len(self.star_rows([labels[i] for i in tau_ids])):
+                raise ValueError('Cannot apply bistellar move!')
+        elif len(vertices) == d + 1 == len(sigma_ids) and len(self.vertices()) > d + 1:
+            if new_vertex_name is None:
+                new_vertex_name = max([0] + [i for i in self.vertices() if isinstance(i, int)]) + 1
+            if new_vertex_name in self.vertices():
+                raise ValueError('Vertex with this name is already in a complex.')
+            if new_vertex_name in labels:
+                tau_ids = [labels.index(new_vertex_name)]
+            else:
+                labels = labels + [new_vertex_name]
+                tau_ids = [len(labels) - 1]
+        else:
+            raise ValueError('Cannot apply bistellar move!')
+
+        new = oriented_move_facets(star.tolist(), sigma_ids, tau_ids)
+        facets = np.vstack([np.delete(self.facets, rows, axis=0), np.array(new, dtype=np.int32)])
+        return [labels[i] for i in tau_ids], OrientedSphere(facets, labels)
+
+    def skew_suspension(self, sigma: Sequence[Hashable], tau: Sequence[Hashable], t: 'OrientedSphere',
+                        new_vertices_names: Tuple[Hashable, Hashable]) -> 'OrientedSphere':
+        """Skew suspension of the move (self, sigma) -> t, see BistellarMove.skew_suspension."""
+        a, b = new_vertices_names
+        s_facets = [_change_orientation(f + [a]) for f in self.oriented_facets()]
+        t_facets = [f + [b] for f in t.oriented_facets()]
+        return OrientedSphere.from_facets(s_facets + t_facets + [list(sigma) + list(tau)])
@@ -0,0 +1,59 @@
+"""Portfolio of randomized searches for a path to the boundary of a simplex, run in parallel with different seeds."""
+import multiprocessing
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+KEEP = ('first', 'shortest')
+
+
+def portfolio_seeds(attempts: int, seed: Optional[int] = None) -> List[int]:
+    """Seeds seed, seed + 1, ..., a random base seed if seed is None."""
+    if seed is None:
+        seed = random.randrange(2 ** 31 - attempts)
+    return [seed + i for i in range(attempts)]
+
+
+def run_portfolio(search: Callable, seeds: List[int], keep: str = 'first', processes: bool = False) -> List:
+    """Runs search(seed=seed, stop_event=stop_event) for every seed in parallel and returns one of the paths.
+
+    keep='first' returns the first path found and sets stop_event to cancel the other searches,
+    keep='shortest' waits for all searches (each one has its own timeout) and returns the shortest path.
+    If every search fails, the first error is raised.
+
+    :param processes: run searches in worker processes (for CPU bound searches) instead of threads.
+    """
+    if keep not in KEEP:
+        raise ValueError(f'Unknown portfolio mode {keep}!')
+
+    manager = None
+    if processes:
+        manager = multiprocessing.Manager()
+        stop_event = manager.Event()
+        executor = ProcessPoolExecutor(len(seeds))
+    else:
+        stop_event = threading.Event()
+        executor = ThreadPoolExecutor(len(seeds))
+
+    paths, errors = [], []
+    try:
+        pending = {executor.submit(search, seed=seed, stop_event=stop_event) for seed in seeds}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    paths.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+            if paths and keep == 'first':
+                break
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True)
+        if manager is not None:
+            manager.shutdown()
+
+    if not paths:
+        raise errors[0]
+    return min(paths, key=len)
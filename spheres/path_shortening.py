@@ -0,0 +1,147 @@
+"""Shortening of paths of bistellar moves [sigma, tau] without changing their start and end."""
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Sequence, Tuple
+
+Facet = FrozenSet[Hashable]
+Move = Sequence[Sequence[Hashable]]
+
+WINDOW = 64  # max distance between two moves cancelled by commuting one of them through the moves in between
+
+
+class _Complex:
+    """Set of facets with vertex stars, moves are applied only if they are valid bistellar moves."""
+    def __init__(self, facets: Iterable[Iterable[Hashable]]):
+        self.facets = set()
+        self.stars: Dict[Hashable, set] = dict()
+        self.hash = 0
+        for f in facets:
+            self._add(frozenset(f))
+
+    def copy(self) -> '_Complex':
+        res = _Complex([])
+        res.facets = set(self.facets)
+        res.stars = {v: set(star) for (v, star) in self.stars.items()}
+        res.hash = self.hash
+        return res
+
+    def _add(self, f: Facet):
+        self.facets.add(f)
+        self.hash ^= hash(f)
+        for v in f:
+            self.stars.setdefault(v, set()).add(f)
+
+    def _remove(self, f: Facet):
+        self.facets.remove(f)
+        self.hash ^= hash(f)
+        for v in f:
+            self.stars[v].discard(f)
+            if not self.stars[v]:
+                del self.stars[v]
+
+    def star(self, simplex: Facet) -> set:
+        stars = sorted((self.stars.get(v, set()) for v in simplex), key=len)
+        return set(f for f in stars[0] if simplex <= f)
+
+    def apply(self, move: Move) -> bool:
+        """Applies the move if it is valid, returns False (and changes nothing) otherwise."""
+        sigma, tau = frozenset(move[0]), frozenset(move[1])
+        removed = [sigma | (tau - {x}) for x in tau]
+        if self.star(sigma) != set(removed) or self.star(tau):
+            return False
+        for f in removed:
+            self._remove(f)
+        for y in sigma:
+            self._add(tau | (sigma - {y}))
+        return True
+
+
+def _delta(move: Move) -> Tuple[List[Facet], List[Facet]]:
+    sigma, tau = frozenset(move[0]), frozenset(move[1])
+    return [sigma | (tau - {x}) for x in tau], [tau | (sigma - {y}) for y in sigma]
+
+
+def _is_cycle(moves: Sequence[Move]) -> bool:
+    """Checks that the moves applied one after another do not change the complex."""
+    balance = dict()
+    for move in moves:
+        removed, added = _delta(move)
+        for f in removed:
+            balance[f] = balance.get(f, 0) - 1
+        for f in added:
+            balance[f] = balance.get(f, 0) + 1
+    return not any(balance.values())
+
+
+def remove_cycles(facets: Iterable[Iterable[Hashable]], moves: Sequence[Move]) -> List[Move]:
+    """Cuts every part of the path which returns to an already visited complex (e.g. a move and its inverse)."""
+    c = _Complex(facets)
+    res = []
+    hashes = [c.hash]
+    first = {c.hash: 0}
+    for move in moves:
+        if not c.apply(move):
+            raise ValueError('Cannot apply bistellar move!')
+        i = first.get(c.hash)
+        if i is not None and _is_cycle(res[i:] + [move]):
+            for h in hashes[i + 1:]:
+                if first.get(h, -1) > i:
+                    del first[h]
+            del res[i:]
+            del hashes[i + 1:]
+            continue
+        res.append(move)
+        hashes.append(c.hash)
+        first.setdefault(c.hash, len(res))
+    return res
+
+
+def _is_inverse(m1: Move, m2: Move) -> bool:
+    return set(m1[0]) == set(m2[1]) and set(m1[1]) == set(m2[0])
+
+
+def cancel_inverse_pairs(facets: Iterable[Iterable[Hashable]], moves: Sequence[Move],
+                         window: int = WINDOW) -> List[Move]:
+    """Removes pairs of mutually inverse moves if the moves between them stay valid without the pair.
+
+    The moves in between then commute with the pair, so the rest of the path is not changed.
+    """
+    c = _Complex(facets)
+    moves = list(moves)
+    res = []
+    i = 0
+    while i < len(moves):
+        move = moves[i]
+        for j in range(i + 1, min(i + window + 1, len(moves))):
+            if not _is_inverse(move, moves[j]):
+                continue
+            q = c.copy()
+            if all(q.apply(m) for m in moves[i + 1:j]):
+                moves = moves[:i] + moves[i + 1:j] + moves[j + 1:]
+                break
+        else:
+            c.apply(move)
+            res.append(move)
+            i += 1
+    return res
+
+
+def shorten_path(facets: Iterable[Iterable[Hashable]], moves: Sequence[Move],
+                 window: int = WINDOW) -> Tuple[List[Move], dict]:
+    """Shorter path of moves [sigma, tau] between the same complexes.
+
+    :return: the path and the report {'before': ..., 'after': ..., 'cycles': ..., 'inverse_pairs': ...}
+        with the numbers of moves removed by each pass.
+    """
+    facets = [frozenset(f) for f in facets]
+    report = {'before': len(moves), 'after': len(moves), 'cycles': 0, 'inverse_pairs': 0}
+    moves = [[list(sigma), list(tau)] for (sigma, tau) in moves]
+    while True:
+        n = len(moves)
+        moves = remove_cycles(facets, moves)
+        report['cycles'] += n - len(moves)
+        m = len(moves)
+        moves = cancel_inverse_pairs(facets, moves, window)
+        report['inverse_pairs'] += m - len(moves)
+        if len(moves) == n:
+            break
+    report['after'] = len(moves)
+    return moves, report
@@ -1,26 +1,26 @@
+import hashlib
 import json
 import os
 import re
+import tempfile
+from functools import partial
 from typing import List, Union, Iterable, Tuple
 
 from sage import all as sg
 
+import settings
 from settings import TMP_DIR
-from spheres.gap_executor import gap_execute_commands
+from spheres import bistellar, homology, path_search, path_shortening
+from spheres.gap_executor import gap_execute_commands, GapSessionPool
+from spheres.invariants import memoized
+from spheres.orientation import ridge_index, permutation_parity, OrientedFacetIndex
+from spheres.oriented_sphere import OrientedSphere
 
 
 def is_homology_sphere(self: sg.SimplicialComplex):
     if self.dimension() == -1:
         raise ValueError
-    if not sg.SimplicialComplex.rename_vertices(self).is_pseudomanifold() \
-            or not self.is_connected():  # needs rename_vertices() due to some bug is sage.is_pseudomanifold()
-        return False
-    h = self.homology()
-    if not all([h[i].order() == 1 for i in range(1, self.dimension())]):
-        return False
-    if not h[self.dimension()].short_name() == 'Z':
-        return False
-    return True
+    return homology.is_homology_sphere([list(f) for f in self.facets()])
 
 
 def rename_vertices(self: sg.SimplicialComplex, subst: Union[str, dict, callable] = 'random',
@@ -43,7 +43,9 @@ def rename_vertices(self: sg.SimplicialComplex, subst: Union[str, dict, callable
     if not sphere:
         result = sg.SimplicialComplex([[names_dict[v] for v in f] for f in self.facets()])
     else:
-        result = Sphere([[names_dict[v] for v in f] for f in self.facets_with_orientation])
+        injective = len(set(names_dict.values())) == len(names_dict)  # otherwise the result may not be a sphere
+        result = Sphere([[names_dict[v] for v in f] for f in self.facets_with_orientation],
+                        validate='none' if injective else 'full')
     if return_dict:
         return result, names_dict
     else:
@@ -61,6 +63,32 @@ def change_orientation(self: Union[sg.Simplex, List]):
     return s
 
 
+def canonical_key(oriented_facets: List[List], marked: List[List] = ()) -> Tuple[str, int]:
+    """Key of oriented facets with marked simplices up to relabeling of vertices and the orientation sign.
+
+    Objects with equal keys are isomorphic, an isomorphism changes the orientation iff their signs differ.
+    The canonical labeling is the one of sage canonical_label of the vertex-facet incidence graph.
+    """
+    vertices = list(set(v for f in list(oriented_facets) + list(marked) for v in f))
+    facet_nodes = [('f', i) for i in range(len(oriented_facets))]
+    mark_nodes = [('m', i) for i in range(len(marked))]
+    graph = sg.Graph()
+    graph.add_vertices([('v', v) for v in vertices] + facet_nodes + mark_nodes)
+    graph.add_edges([(('f', i), ('v', v)) for (i, f) in enumerate(oriented_facets) for v in f] +
+                    [(('m', i), ('v', v)) for (i, f) in enumerate(marked) for v in f])
+    partition = [[('v', v) for v in vertices], facet_nodes] + [[q] for q in mark_nodes]
+    _, certificate = graph.canonical_label(partition=partition, certificate=True)
+
+    label = {v: int(certificate[('v', v)]) for v in vertices}
+    images = [[label[v] for v in f] for f in oriented_facets]
+    form = [sorted(sorted(f) for f in images)] + [sorted(label[v] for v in f) for f in marked]
+    key = hashlib.sha256(json.dumps(form).encode()).hexdigest()
+
+    first = min(images, key=sorted)  # the canonical orientation is the one of sorted first facet
+    sign = -1 if permutation_parity(first, sorted(first)) else 1
+    return key, sign
+
+
 basic_is_isomorphic = sg.SimplicialComplex.is_isomorphic
 
 
@@ -92,20 +120,49 @@ sg.Simplex.__init__ = decorate_init(sg.Simplex.__init__)  # now sg.Simplex has s
 
 
 class Sphere(sg.SimplicialComplex):
-    def __init__(self, data: Union[Iterable[List], sg.SimplicialComplex], **kwargs):
+    def __init__(self, data: Union[Iterable[List], sg.SimplicialComplex], validate: str = 'full',
+                 oriented: bool = False, **kwargs):
+        """
+        :param validate: 'full' checks homology, 'cheap' checks only that data is a connected pseudomanifold,
+            'none' trusts data (use it when data is obtained from a valid sphere).
+            settings.SPHERE_FULL_VALIDATION turns on 'full' checks everywhere.
+        :param oriented: data is a list of consistently oriented facets, keep it as facets_with_orientation.
+        """
+        if validate not in ('full', 'cheap', 'none'):
+            raise ValueError(f'Unknown validation mode {validate}!')
+        if settings.SPHERE_FULL_VALIDATION:
+            validate = 'full'
+
         self.__class__.meta_d = self.__class__
         if isinstance(data, sg.SimplicialComplex):
             data = data.facets()
 
+        if validate == 'none':
+            kwargs.setdefault('maximality_check', False)  # facets of a valid sphere are maximal
         super(Sphere, self).__init__(data, **kwargs)
-        if not self.is_homology_sphere():
+        if validate == 'full' and not self.is_homology_sphere():
             raise ValueError('Complex is not a sphere!')
         self.set_immutable()
 
-        if not self.facets() == set(sg.Simplex(s) for s in data):
+        if validate != 'none' and not self.facets() == set(sg.Simplex(s) for s in data):
             raise ValueError('Data is not list of facets!')
 
-        self.facets_with_orientation = self.orient(list(data)[0])
+        try:
+            if oriented:
+                self.facets_with_orientation = [list(f) for f in data]
+                if validate != 'none':
+                    ridge_index(self.facets_with_orientation)
+                    if not homology.is_consistently_oriented(self.facets_with_orientation):
+                        raise ValueError('Not a valid orientation!')
+            else:
+                self._compact = OrientedSphere.from_facets([list(f) for f in self.facets()], list(list(data)[0]))
+                self.facets_with_orientation = self._compact.oriented_facets()
+        except ValueError:
+            if validate == 'none':
+                raise
+            raise ValueError('Complex is not a sphere!')
+        if validate == 'cheap' and len(self.facets_with_orientation) != len(self.facets()):
+            raise ValueError('Complex is not a sphere!')
 
     def rename_vertices(self, subst: Union[str, dict, callable] = 'random'):
         return super(Sphere, self).rename_vertices(subst, sphere=True)
@@ -128,29 +185,46 @@ class Sphere(sg.SimplicialComplex):
                 res = res[0], oriented
         return res
 
+    def canonical_key(self) -> Tuple[str, int]:
+        """Key of the sphere up to relabeling of vertices and its orientation relative to the canonical one."""
+        if getattr(self, '_canonical_key', None) is None:
+            self._canonical_key = canonical_key(self.facets_with_orientation)
+        return self._canonical_key
+
+    def automorphism_group(self, *args, **kwargs):
+        """Memoized for the default arguments, the sphere is immutable."""
+        if args or kwargs:
+            return super(Sphere, self).automorphism_group(*args, **kwargs)
+        return memoized(self, 'automorphism_group', super(Sphere, self).automorphism_group, shared=False)
+
+    def is_homology_sphere(self):
+        """Memoized, shared with isomorphic spheres if the canonical key is already known."""
+        return memoized(self, 'is_homology_sphere', super(Sphere, self).is_homology_sphere,
+                        shared=getattr(self, '_canonical_key', None) is not None)
+
     def is_minus_self(self):
-        """Checks if a sphere has automorphism changing the orientation."""
+        """Checks if a sphere has automorphism changing the orientation (memoized, shared with isomorphic spheres)."""
+        return memoized(self, 'is_minus_self', self._is_minus_self)
+
+    def _is_minus_self(self):
         gr = self.automorphism_group()
-        for gen in gr.gens():
-            subst = gen.dict()
-            if not self.check_oriented_facet([subst[v] for v in list(self.facets_with_orientation[0])]):
-                return True
-        return False
+        f = list(self.facets_with_orientation[0])
+        substs = [gen.dict() for gen in gr.gens()]
+        images = [[subst[v] for v in f] for subst in substs]
+        return not all(self.check_oriented_facets(images))
 
     def is_valid(self) -> bool:
         if not self.is_homology_sphere():
             raise ValueError('Complex is not a sphere!')
         if not set(sg.Simplex(f) for f in self.facets_with_orientation) == self.facets():
             raise ValueError('Facets not equals to calculated facets_with_orientation!')
-        for e in self.flip_graph().edges():
-            v1 = list(set(e[0]) - set(e[1]))
-            v2 = list(set(e[1]) - set(e[0]))
-            if not len(v1) == len(v2) == 1:
+        facets = self.facets_with_orientation
+        for ridge, neighbours in ridge_index(facets).items():
+            if not len(neighbours) == 2:
                 raise ValueError
-            v1 = v1[0]
-            v2 = v2[0]
-            e0_oriented = [f for f in self.facets_with_orientation if set(f) == set(e[0])][0]
-            neg = [v if v != v1 else v2 for v in e0_oriented]
+            f0, f1 = facets[neighbours[0]], facets[neighbours[1]]
+            v2, = set(f1) - set(f0)
+            neg = [v if v in ridge else v2 for v in f0]
             pos = change_orientation(neg)
             if not self.check_oriented_facet(pos):
                 raise ValueError('Not a valid orientation!')
@@ -158,41 +232,21 @@ class Sphere(sg.SimplicialComplex):
 
     def orient(self, oriented_facet) -> List[List]:
         """Create list of oriented facets by BFS starting from oriented_facet."""
-        if isinstance(oriented_facet, sg.Simplex):
-            oriented_facet = list(oriented_facet)
-        oriented_facet_sim = sg.Simplex(oriented_facet)
-        g = self.flip_graph()
-        edges = list(g.breadth_first_search(oriented_facet_sim, edges=True))
-        oriented_facets = [oriented_facet]
-        for e in edges:
-            v1 = list(set(e[0]) - set(e[1]))
-            v2 = list(set(e[1]) - set(e[0]))
-            if not len(v1) == len(v2) == 1:
-                raise ValueError
-            v1 = v1[0]
-            v2 = v2[0]
-            e0_oriented = [f for f in oriented_facets if set(f) == set(e[0])][0]
-            neg = [v if v != v1 else v2 for v in e0_oriented]
-            pos = change_orientation(neg)
-            oriented_facets.append(pos)
-        return oriented_facets
+        return OrientedSphere.from_facets([list(f) for f in self.facets()], list(oriented_facet)).oriented_facets()
+
+    @property
+    def compact(self) -> OrientedSphere:
+        """Compact core of the sphere with the same oriented facets, built once per sphere."""
+        if getattr(self, '_compact', None) is None:
+            self._compact = OrientedSphere.from_sphere(self)
+        return self._compact
 
     def d(self):
-        return Chain(Sphere, [(1, Sphere(self.link_oriented([i]))) for i in self.vertices()])
+        return Chain(Sphere, [(1, Sphere(self.link_oriented([i]), validate='cheap')) for i in self.vertices()])
 
     def link_oriented(self, v: Union[sg.Simplex, List]) -> List[List]:
         """:return: set of simplices s of link(self, v) with orientation such that s+v is oriented simplex of self"""
-        facets = list(self.link(v).facets())
-        if not isinstance(v, list):
-            v = list(v)
-        res = list()
-        for s in facets:
-            s = list(s)
-            if self.check_oriented_facet(s + v):
-                res.append(s)
-            else:
-                res.append(change_orientation(s))
-        return res
+        return self.compact.link_oriented(list(v)).oriented_facets()
 
     def barycentric_subdivision(self):
         """Makes a barycentric subdivided sphere with induced orientation."""
@@ -207,48 +261,93 @@ class Sphere(sg.SimplicialComplex):
             facets[0] = list(facets[0])
             facets[0][0], facets[0][1] = facets[0][1], facets[0][0]
             facets[0] = sg.Simplex(facets[0])
-        return Sphere(facets)
+        return Sphere(facets, validate='none')
+
+    @property
+    def oriented_facet_index(self) -> OrientedFacetIndex:
+        """Oriented facets keyed by vertex sets, built once per sphere."""
+        if getattr(self, '_oriented_facet_index', None) is None:
+            self._oriented_facet_index = OrientedFacetIndex(self.facets_with_orientation)
+        return self._oriented_facet_index
 
     def check_oriented_facet(self, f: Union[List, sg.Simplex]) -> bool:
-        q = [s for s in self.facets_with_orientation if set(s) == set(f)]
-        if not len(q) == 1:
-            raise ValueError('Not a facet!')
-        d = {v: i + 1 for (i, v) in enumerate(f)}
-        perm = [d[v] for v in list(q[0])]
-        if sg.Permutation(perm).is_even():
-            return True
-        return False
-
-    def path_to_simplex(self, timeout=3):
-        """Returns list of BistellarMove objects representing the path to trivial sphere."""
+        return self.oriented_facet_index.is_oriented(list(f))
+
+    def check_oriented_facets(self, facets: Iterable[Union[List, sg.Simplex]]) -> List[bool]:
+        """Batch version of check_oriented_facet."""
+        return self.oriented_facet_index.are_oriented([list(f) for f in facets])
+
+    def path_to_simplex(self, timeout=3, backend='gap', seed=None, gap_pool: GapSessionPool = None,
+                        attempts=1, keep='first'):
+        """Returns list of BistellarMove objects representing the path to trivial sphere.
+
+        :param backend: 'gap' runs BISTELLAR.gap in GAP, 'native' runs the same heuristics in-process.
+        :param seed: random seed of the search (GAP keeps its default seed if None and attempts == 1).
+        :param gap_pool: pool of warm GAP sessions (e.g. gap_executor.default_pool()), a new GAP process if None.
+        :param attempts: number of searches with seeds seed, seed + 1, ... run in parallel
+            (GAP searches in threads, native ones in processes).
+        :param keep: 'first' returns the first path found and cancels the other searches,
+            'shortest' waits for all searches (each one within timeout) and returns the shortest path.
+        """
+        if backend == 'gap':
+            search = partial(self._gap_path_to_simplex, timeout, gap_pool)
+        elif backend == 'native':
+            search = partial(bistellar.find_path_to_simplex, [list(f) for f in self.facets_with_orientation],
+                             timeout)
+        else:
+            raise ValueError(f'Unknown backend {backend}!')
+
+        if attempts == 1:
+            moves = search(seed=seed)
+        else:
+            moves = path_search.run_portfolio(search, path_search.portfolio_seeds(attempts, seed), keep,
+                                              processes=backend == 'native')
+        return self.replay_moves(moves)
+
+    def replay_moves(self, moves: List[List[List]]) -> List['BistellarMove']:
+        """Turn moves [sigma, tau] into BistellarMove objects starting from self."""
+        bm = []
+        sphere = self
+        for move in moves:
+            if len(move[1]) == 1:
+                v = move[1][0]
+            else:
+                v = None
+            bm.append(BistellarMove(sphere, move[0], new_vertex_name=v))
+            sphere = bm[-1].t
+
+        return bm
+
+    def _gap_path_to_simplex(self, timeout, gap_pool: GapSessionPool = None, seed=None,
+                             stop_event=None) -> List[List[List]]:
         vertices_dict = {b: a+1 for (a, b) in enumerate(self.vertices())}
         vertices_dict_reverse = {v: k for (k, v) in vertices_dict.items()}
         s = self.rename_vertices(vertices_dict)
 
         facets = [list(f) for f in s.facets_with_orientation]
 
-        log_file, out_file, in_file = f'{TMP_DIR}/BISTELLAR.log', f'{TMP_DIR}/BISTELLAR.out', f'{TMP_DIR}/BISTELLAR.in'
+        bistellar_path = os.path.join(os.path.dirname(__file__), 'BISTELLAR.gap')
+        with tempfile.TemporaryDirectory(prefix='bistellar_', dir=TMP_DIR) as work_dir:  # one per call
+            log_file, out_file, in_file = (os.path.join(work_dir, f'BISTELLAR.{ext}') for ext in ('log', 'out', 'in'))
 
-        for f in (log_file, out_file, in_file):
+            seeding = [] if seed is None else [f'Reset(GlobalMersenneTwister, {seed});']
+            execute = gap_execute_commands if gap_pool is None else gap_pool.execute
             try:
-                os.remove(f)
-            except FileNotFoundError:
-                pass
-
-        bistellar_path = os.path.join(os.path.dirname(__file__), 'BISTELLAR.gap')
-        try:
-            status = gap_execute_commands([f'log_file := String("{log_file}");',
-                                           f'out_file := String("{out_file}");',
-                                           f'in_file := String("{in_file}");',
-                                           f'type_of_object := 1;',
-                                           f'facets := {facets};',
-                                           (f'Read("{bistellar_path}");', timeout)])
-        except Exception as e:
-            raise e
-        if not status[-1] == (['The examined complex is a sphere!!!\n'], 'ok', {}):
-            raise Exception(f'Gap returned {status[-1]}')
-
-        moves = json.load(open(log_file))
+                status = execute(seeding + [f'log_file := String("{log_file}");',
+                                            f'out_file := String("{out_file}");',
+                                            f'in_file := String("{in_file}");',
+                                            f'type_of_object := 1;',
+                                            f'facets := {facets};',
+                                            (f'Read("{bistellar_path}");', timeout)], stop_event=stop_event)
+            except Exception:
+                if stop_event is not None and stop_event.is_set():
+                    raise TimeoutError('Bistellar path search was cancelled.')
+                raise
+            if not status[-1] == (['The examined complex is a sphere!!!\n'], 'ok', {}):
+                raise Exception(f'Gap returned {status[-1]}')
+
+            with open(log_file) as f:
+                moves = json.load(f)
         moves = moves[:-1]  # the last line in log_file is []]
         for move in moves:
             for v in move[0] + move[1]:
@@ -257,17 +356,7 @@ class Sphere(sg.SimplicialComplex):
             move[0] = [vertices_dict_reverse[v] for v in move[0]]
             move[1] = [vertices_dict_reverse[v] for v in move[1]]
 
-        bm = []
-        sphere = self
-        for move in moves:
-            if len(move[1]) == 1:
-                v = move[1][0]
-            else:
-                v = None
-            bm.append(BistellarMove(sphere, move[0], new_vertex_name=v))
-            sphere = bm[-1].t
-
-        return bm
+        return moves
 
 
 Sphere.meta_d = Sphere
@@ -275,43 +364,20 @@ Sphere.meta_d = Sphere
 
 class BistellarMove(sg.SimplicialComplex):
     def __init__(self, sphere: Sphere, sigma: List, new_vertex_name=None):
-        s = sphere.facets_with_orientation
-        super(BistellarMove, self).__init__(s)
-
-        if new_vertex_name is None:
-            new_vertex_name = max([0] + [i for i in self.vertices() if isinstance(i, int)]) + 1
-
-        self.dim = self.dimension()  # dimension of a sphere
+        """The move replaces the star of sigma in sphere by the star of tau, it is done on sphere.compact."""
+        self.dim = sphere.dimension()  # dimension of a sphere
         self.sigma = sigma
+        self.tau, t = sphere.compact.bistellar_move(sigma, new_vertex_name)
 
-        v = list(self.star(sigma).vertices())
-        if len(v) == self.dimension() + 2:
-            pass
-        elif len(v) == self.dimension() + 1 == len(sigma) and len(self.vertices()) > self.dimension() + 1:
-            if new_vertex_name in self.vertices():
-                raise ValueError('Vertex with this name is already in a complex.')
-            v.append(new_vertex_name)
-        else:
-            raise ValueError('Cannot apply bistellar move!')
-
-        self.tau = list(set(v) - set(sigma))
-
-        self.add_face(v)
-
-        t = s.copy()
-        sim = sg.SimplicialComplex([v])
-        sim.remove_face(v)
-        facet = [facet for facet in s if sg.Simplex(facet) in sim.facets()][0]
-        sim = sim.as_sphere().orient(oriented_facet=facet)
+        n_kept = len(t) - len(sigma)  # the new facets are the last ones of t
+        kept = t.oriented_facets()[:n_kept]
+        super(BistellarMove, self).__init__(kept + [list(sigma) + self.tau], maximality_check=False)
 
-        for facet in sim:
-            if set(facet) in [set(f) for f in t]:
-                t.remove([f for f in t if set(f) == set(facet)][0])
-            else:
-                t.append(change_orientation(facet))
-
-        self.s = Sphere(s)
-        self.t = Sphere(t)
+        self.s = sphere
+        self.t = t.to_sphere()  # bistellar moves preserve PL-homeomorphism type
+        if getattr(sphere, '_oriented_facet_index', None) is not None:
+            index = sphere._oriented_facet_index
+            self.t._oriented_facet_index = index.moved(index.star(sigma), self.t.facets_with_orientation[n_kept:])
 
     def is_isomorphic(self, other, certificate=False):
         c_self = self.s.cone() \
@@ -333,6 +399,12 @@ class BistellarMove(sg.SimplicialComplex):
 
         return res
 
+    def canonical_key(self) -> Tuple[str, int]:
+        """Key of the move up to relabeling of vertices and the orientation of s relative to the canonical one."""
+        if getattr(self, '_canonical_key', None) is None:
+            self._canonical_key = canonical_key(self.s.facets_with_orientation, [self.sigma, self.tau])
+        return self._canonical_key
+
     def inverse(self):
         new_vertex_name = self.sigma[0] if len(self.sigma) == 1 else None
         return BistellarMove(self.t, self.tau, new_vertex_name=new_vertex_name)
@@ -343,7 +415,17 @@ class BistellarMove(sg.SimplicialComplex):
         res = self.s.link_oriented(simplex)
         sigma = list(set(self.sigma) - set(simplex))
         new_vertex_name = self.tau[0] if len(self.tau) == 1 else None
-        return BistellarMove(Sphere(res), sigma, new_vertex_name)
+        return BistellarMove(Sphere(res, validate='cheap'), sigma, new_vertex_name)
+
+    def link_task(self, simplex) -> Tuple[Tuple[tuple, ...], tuple, tuple]:
+        """Picklable form (oriented facets of s, sigma, tau) of link(simplex), built without sage objects.
+
+        See move_from_task, it is meant to be sent to other processes.
+        """
+        if not set(simplex).issubset(set(self.sigma + self.tau)):
+            raise ValueError('Invalid simplex for link of bistellar move.')
+        facets = tuple(tuple(f) for f in self.s.link_oriented(simplex))
+        return facets, tuple(v for v in self.sigma if v not in simplex), tuple(v for v in self.tau if v not in simplex)
 
     def delta(self):
         return Chain(Sphere, [(1, self.t), (-1, self.s)])
@@ -356,65 +438,102 @@ class BistellarMove(sg.SimplicialComplex):
         if a in self.vertices() or b in self.vertices():
             raise ValueError('Vertex with this name is already in a complex.')
 
-        s_facets = [change_orientation(list(f) + [a]) for f in self.s.facets_with_orientation]
-        t_facets = [list(f) + [b] for f in self.t.facets_with_orientation]
-        extra_facet = self.sigma + self.tau  # not oriented!
-        return Sphere(s_facets + t_facets + [extra_facet])
+        return self.s.compact.skew_suspension(self.sigma, self.tau, self.t.compact, (a, b)).to_sphere()
+
+
+def move_from_task(task: Tuple[Tuple[tuple, ...], tuple, tuple]) -> BistellarMove:
+    """BistellarMove from its form (oriented facets of s, sigma, tau), the facets are trusted (see link_task)."""
+    facets, sigma, tau = task
+    new_vertex_name = tau[0] if len(tau) == 1 else None
+    sphere = Sphere([list(f) for f in facets], validate='none', oriented=True)
+    return BistellarMove(sphere, list(sigma), new_vertex_name)
+
+
+def shorten_moves(moves: List[BistellarMove]) -> Tuple[List[BistellarMove], dict]:
+    """Shorter path between the same spheres (see path_shortening.shorten_path) and the report on saved moves."""
+    if not moves:
+        return moves, {'before': 0, 'after': 0, 'cycles': 0, 'inverse_pairs': 0}
+    path = [[list(m.sigma), list(m.tau)] for m in moves]
+    short, report = path_shortening.shorten_path([list(f) for f in moves[0].s.facets_with_orientation], path)
+    n = next((i for (i, (a, b)) in enumerate(zip(path, short)) if a != b), min(len(path), len(short)))
+    start = moves[n - 1].t if n else moves[0].s  # BistellarMove objects of the unchanged beginning are reused
+    return moves[:n] + start.replay_moves(short[n:]), report
 
 
 class Chain:
+    """Linear combination of objects with canonical_key() (spheres, moves) up to oriented isomorphism.
+
+    Terms are kept in a dict canonical key -> [coefficient for the canonical orientation, representative, its sign].
+    Zero terms and terms isomorphic to themselves with the opposite orientation are handled lazily,
+    when data is requested.
+    """
     def __init__(self, meta, data: List[Tuple], ring=sg.Integers()):
         self.meta = meta
         self.ring = ring
-        self.data = [(self.ring(c), q) for (c, q) in data]
+        self._terms = dict()
+        self._add_terms((self.ring(c), q) for (c, q) in data)
+
+    def _add_terms(self, data: Iterable[Tuple]):
+        for c, q in data:
+            key, sign = q.canonical_key()
+            term = self._terms.get(key)
+            if term is None:
+                self._terms[key] = [c * sign, q, sign]
+            else:
+                term[0] += c * sign
+        self._simplified = False
 
-        self.simplify()
+    def _copy(self, x=1) -> 'Chain':
+        res = Chain(self.meta, [], self.ring)
+        res._terms = {key: [c * x, q, sign] for (key, (c, q, sign)) in self._terms.items()}
+        res._simplified = self._simplified
+        return res
 
     def simplify(self):
-        res = []
-        for i, (c1, q1) in enumerate(self.data):
-            found = False
-            for j, (c2, q2) in enumerate(res):
-                iso, orientation = q1.is_isomorphic(q2, certificate=False, with_multiple=True)
-                if iso:
-                    found = True
-                    res[j] = c2 + c1 * orientation, q2
-                    if res[j][0] == 0:
-                        res.pop(j)
-                    break
-            if not found:
-                res.append((c1, q1))
-        self.data = res
-        res = []
-        for c, q in self.data:
+        if self._simplified:
+            return
+        terms = dict()
+        for key, (c, q, sign) in self._terms.items():
+            if c == 0:
+                continue
             if q.is_minus_self():
                 if self.ring.characteristic() == 2:
-                    res.append((c, q))
+                    terms[key] = [c, q, sign]
                 elif self.ring.characteristic() == 0:
                     if self.ring == sg.ZZ and c % 2:
-                        res.append((c % 2, q))
+                        terms[key] = [c % 2, q, 1]  # q is isomorphic to -q, so the coefficient is 1 in both
             else:
-                res.append((c, q))
-        self.data = res
+                terms[key] = [c, q, sign]
+        self._terms = terms
+        self._simplified = True
+
+    @property
+    def data(self) -> List[Tuple]:
+        """List of pairs (coefficient, object) with pairwise non-isomorphic objects."""
+        self.simplify()
+        return [(c * sign, q) for (c, q, sign) in self._terms.values()]
 
     def __add__(self, other):
-        return Chain(self.meta, self.data + other.data, self.ring)
+        res = self._copy()
+        res._add_terms((c * sign, q) for (c, q, sign) in other._terms.values())
+        return res
 
     def __rmul__(self, x):
-        return Chain(self.meta, [(c * x, q) for (c, q) in self.data], self.ring)
+        return self._copy(self.ring(x))
 
     def __mul__(self, x):
-        return Chain(self.meta, [(c * x, q) for (c, q) in self.data], self.ring)
+        return self._copy(self.ring(x))
 
     def __sub__(self, other):
         return self + -1 * other
 
     def d(self):
-        res = []
-        for (c, q) in self.data:
-            chain = q.d() * c
-            res += chain.data
-        return Chain(self.meta.meta_d, res, self.ring)
+        res = Chain(self.meta.meta_d, [], self.ring)
+        for (c, q, sign) in self._terms.values():
+            if c:
+                res._add_terms((self.ring(c * sign * c2 * sign2), q2)
+                               for (c2, q2, sign2) in q.d()._terms.values())
+        return res
 
     def apply_homomorphism(self, h, new_ring=None):
         if new_ring is None:
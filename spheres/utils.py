@@ -33,3 +33,33 @@ def chains_tensor_product(a: sg.CombinatorialFreeModule, b: sg.CombinatorialFree
     res.boundary_0 = lambda chain: boundary_n(chain, 0, a, b)
     res.boundary_1 = lambda chain: boundary_n(chain, 1, a, b)
     return res
+
+
+def tensor_to_matrix(chain: ChainElement, g1, g2):
+    """Element of C_i (x) C_j as a sparse |C_i| x |C_j| matrix, the entry (a, b) is the coefficient of a (x) b."""
+    index1 = {k: i for (i, k) in enumerate(g1.get_order())}
+    index2 = {k: i for (i, k) in enumerate(g2.get_order())}
+    return sg.matrix(sg.QQ, len(index1), len(index2),
+                     {(index1[a], index2[b]): c for ((a, b), c) in chain.monomial_coefficients().items()}, sparse=True)
+
+
+def matrix_to_tensor(x, module, g1, g2) -> ChainElement:
+    """Inverse of tensor_to_matrix, module is the tensor product of g1 and g2."""
+    order1, order2 = g1.get_order(), g2.get_order()
+    return module.sum_of_terms(((order1[i], order2[j]), c) for ((i, j), c) in x.dict().items())
+
+
+def tensor_boundary_0(x, d1):
+    """Matrix form of boundary_n(chain, 0, g1, g2), rows of d1 are boundaries of the basis of g1."""
+    return d1.transpose() * x
+
+
+def tensor_boundary_1(x, d2):
+    """Matrix form of boundary_n(chain, 1, g1, g2), rows of d2 are boundaries of the basis of g2."""
+    return x * d2
+
+
+def sum_of_outer_products(vectors, coefficients, n: int):
+    """Matrix form of sum(c * a.tensor(a)) for chains a given by vectors of length n."""
+    e = sg.matrix(sg.QQ, len(vectors), n, vectors, sparse=True)
+    return e.transpose() * sg.diagonal_matrix(sg.QQ, coefficients, sparse=True) * e
@@ -0,0 +1,179 @@
+"""Work queue in a shared directory: an Executor for gg on one node and workers on any nodes that see the directory.
+
+Layout of the directory: tasks/ holds pickled (fn, args, kwargs) waiting for workers, a worker claims a task by
+renaming it into claimed/ (atomic, so every task is run once) and writes the pickled outcome into results/.
+A claimed file is named TASK_ID.CLAIM_TIME_NS.WORKER, the claim time is not the mtime (that is the submit time).
+Functions are pickled by reference, so workers need the same code on their import path.
+
+Run a worker with: python -m spheres.work_queue DIRECTORY
+"""
+import argparse
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future
+from typing import Optional
+
+POLL_INTERVAL = .1  # seconds between scans of the directory
+
+
+def _dirs(directory: str) -> dict:
+    res = {name: os.path.join(directory, name) for name in ('tasks', 'claimed', 'results', 'tmp')}
+    for path in res.values():
+        os.makedirs(path, exist_ok=True)
+    return res
+
+
+def _write(obj, tmp_dir: str, path: str):
+    """Writes obj so that readers never see a partial file."""
+    tmp = os.path.join(tmp_dir, uuid.uuid4().hex)
+    with open(tmp, 'wb') as f:
+        pickle.dump(obj, f)
+    os.rename(tmp, path)
+
+
+def _read(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # already removed
+
+
+class FileQueueExecutor(Executor):
+    """Executor putting tasks into a queue directory, the futures get results pushed back by workers.
+
+    :param requeue_after: claimed tasks without a result for so many seconds are returned to the queue
+        (their workers are considered dead), it must exceed the longest task. Never if None.
+    """
+    def __init__(self, directory: str, poll_interval: float = POLL_INTERVAL, requeue_after: Optional[float] = None):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.requeue_after = requeue_after
+        self._dirs = _dirs(directory)
+        self._futures = dict()  # task id -> future
+        self._requeued = set()  # ids of requeued tasks, their workers may still write duplicate results
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        if self._shutdown:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        task_id = f'{time.time_ns():020d}-{uuid.uuid4().hex}'  # workers take older tasks first
+        future = Future()
+        with self._lock:
+            self._futures[task_id] = future
+        _write((fn, args, kwargs), self._dirs['tmp'], os.path.join(self._dirs['tasks'], task_id))
+        return future
+
+    def _collect(self):
+        while not self._shutdown or self._futures:
+            for task_id in os.listdir(self._dirs['results']):
+                with self._lock:
+                    future = self._futures.pop(task_id, None)
+                path = os.path.join(self._dirs['results'], task_id)
+                if future is None:
+                    if task_id in self._requeued:
+                        _remove(path)  # a duplicate result of a requeued task
+                    continue  # otherwise a task of another executor sharing the directory
+                if task_id in self._requeued:
+                    _remove(os.path.join(self._dirs['tasks'], task_id))  # the copy waiting for another worker
+                try:
+                    ok, value = _read(path)
+                except Exception as e:  # e.g. the class of the value cannot be imported here
+                    ok, value = False, e
+                os.remove(path)
+                if future.set_running_or_notify_cancel():
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+            if self.requeue_after is not None:
+                self._requeue()
+            time.sleep(self.poll_interval)
+
+    def _requeue(self):
+        now = time.time_ns()
+        for name in os.listdir(self._dirs['claimed']):
+            task_id, claimed_at = (name.split('.') + [''])[:2]
+            if task_id not in self._futures or not claimed_at.isdigit():
+                continue  # not a task of this executor
+            if now - int(claimed_at) > self.requeue_after * 1e9:
+                try:
+                    os.rename(os.path.join(self._dirs['claimed'], name), os.path.join(self._dirs['tasks'], task_id))
+                except OSError:
+                    continue  # the worker has just finished
+                self._requeued.add(task_id)
+
+    def shutdown(self, wait=True, **kwargs):
+        self._shutdown = True
+        if wait:
+            self._collector.join()
+
+
+def run_worker(directory: str, poll_interval: float = POLL_INTERVAL, idle_timeout: Optional[float] = None,
+               stop_event=None) -> int:
+    """Runs tasks from the queue directory until it is idle for idle_timeout seconds (or stop_event is set).
+
+    :return: the number of tasks run
+    """
+    dirs = _dirs(directory)
+    name = f'{socket.gethostname()}-{os.getpid()}'
+    n_tasks = 0
+    idle_since = time.time()
+    while stop_event is None or not stop_event.is_set():
+        claimed = _claim(dirs, name)
+        if claimed is None:
+            if idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        task_id = os.path.basename(claimed).split('.', 1)[0]
+        try:
+            fn, args, kwargs = _read(claimed)
+        except OSError:
+            continue  # requeued already, another worker runs it
+        try:
+            outcome = True, fn(*args, **kwargs)
+        except Exception as e:
+            outcome = False, e
+        try:
+            _write(outcome, dirs['tmp'], os.path.join(dirs['results'], task_id))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:  # unpicklable result or exception
+            _write((False, RuntimeError(repr(e))), dirs['tmp'], os.path.join(dirs['results'], task_id))
+        if os.path.exists(claimed):
+            os.remove(claimed)
+        n_tasks += 1
+        idle_since = time.time()
+    return n_tasks
+
+
+def _claim(dirs: dict, name: str) -> Optional[str]:
+    """Path of the claimed file of the oldest task, None if there are no tasks."""
+    for task_id in sorted(os.listdir(dirs['tasks'])):
+        claimed = os.path.join(dirs['claimed'], f'{task_id}.{time.time_ns()}.{name}')  # see FileQueueExecutor._requeue
+        try:
+            os.rename(os.path.join(dirs['tasks'], task_id), claimed)
+        except OSError:
+            continue  # claimed by another worker
+        return claimed
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Worker running tasks from a work queue directory.')
+    parser.add_argument('directory')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL)
+    parser.add_argument('--idle-timeout', type=float, default=None, help='exit after so many idle seconds')
+    arguments = parser.parse_args()
+    print(run_worker(arguments.directory, arguments.poll_interval, arguments.idle_timeout))
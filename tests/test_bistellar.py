@@ -0,0 +1,34 @@
+from itertools import product
+
+from spheres.bistellar import BistellarEngine, find_path_to_simplex
+from spheres.oriented_sphere import OrientedSphere
+
+
+def cross_polytope(d):
+    return [[s * v for (s, v) in zip(signs, range(1, d + 1))] for signs in product([1, -1], repeat=d)]
+
+
+def test_engine_options():
+    engine = BistellarEngine(cross_polytope(3))
+    assert len(engine.options[1]) == 12  # every edge of the octahedron
+    assert len(engine.options[2]) == 0
+    sigma = frozenset([1, 2])
+    assert engine.is_valid_option(sigma)
+
+    engine.move(sigma, engine.taus[sigma])
+    assert len(engine.facets) == 8
+    assert not engine.is_face(sigma) and engine.is_face(frozenset([-3, 3]))
+    assert len(engine.options[2]) == 2  # vertices 1 and 2 now have degree 3
+
+
+def test_find_path_to_simplex():
+    for d in [3, 4, 5]:
+        facets = cross_polytope(d)
+        moves = find_path_to_simplex(facets, timeout=60, seed=0)
+        assert moves == find_path_to_simplex(facets, timeout=60, seed=0)
+
+        s = OrientedSphere.from_facets(facets)
+        for sigma, tau in moves:
+            tau_, s = s.bistellar_move(sigma)
+            assert set(tau_) == set(tau)
+        assert len(s) == d + 1
@@ -0,0 +1,38 @@
+import pytest
+
+from spheres.boundary import SimplexIndex
+
+OCTAHEDRON = [[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)]
+
+
+def multiply(a, b):
+    res = dict()
+    for (i, j), x in a.items():
+        for (j2, k), y in b.items():
+            if j == j2:
+                res[i, k] = res.get((i, k), 0) + x * y
+    return {key: x for (key, x) in res.items() if x}
+
+
+def test_simplex_index():
+    index = SimplexIndex(OCTAHEDRON)
+    assert index.dimension() == 2
+    assert [len(q) for q in index.faces] == [6, 12, 8]
+    assert index.shape(2) == (8, 12)
+    assert index.faces[1][index[[3, 1]]] == (1, 3)
+    with pytest.raises(ValueError):
+        index[[1, 2]]
+
+    assert multiply(index.boundary(2), index.boundary(1)) == {}
+    assert index.coboundary(1) == {(j, i): c for ((i, j), c) in index.boundary(2).items()}
+    assert index.boundary(2)[index[[1, 3, 5]], index[[3, 5]]] == 1
+    assert index.boundary(2)[index[[1, 3, 5]], index[[1, 5]]] == -1
+
+
+def test_simplex_index_order():
+    order = [(6,), (5,), (4,), (3,), (2,), (1,)]
+    index = SimplexIndex(OCTAHEDRON, {0: order})
+    assert index.faces[0] == order and index[[6]] == 0
+    assert index.boundary(1)[index[[1, 3]], index[[1]]] == -1
+    with pytest.raises(ValueError):
+        SimplexIndex(OCTAHEDRON, {0: order[1:]})
@@ -0,0 +1,60 @@
+import pytest
+
+from spheres.checkpoint import Checkpoint
+
+
+def test_checkpoint(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    facets = [[1, 2], [2, 3], [3, 1]]
+    moves = [[[1, 2], [4]], [[4], [1, 2]]]
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.path(facets) is None
+        key = checkpoint.add_path(facets, moves)
+        checkpoint.put(key, 0, 1, '1/2')
+        checkpoint.put(key, 1, 4, '-3')
+
+    with open(path, 'a') as f:
+        f.write('{"path": "' + key + '", "mo')  # a line cut by a crash
+
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.path([[3, 1], [1, 2], [2, 3]]) == moves
+        assert checkpoint.add_path(facets, moves) == key
+        assert checkpoint.values(key) == {(0, 1): '1/2', (1, 4): '-3'}
+        checkpoint.put(key, 1, 2, '0')
+
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.values(key) == {(0, 1): '1/2', (1, 4): '-3', (1, 2): '0'}
+        assert checkpoint.values('another path') == dict()
+
+
+def test_checkpoint_vertices(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    facets = [[(0, 1), (1, 'a')], [(1, 'a'), 'b'], ['b', (0, 1)]]
+    moves = [[[(0, 1), (1, 'a')], [((2, 2), 'c')]]]
+    with Checkpoint(path) as checkpoint:
+        key = checkpoint.add_path(facets, moves)
+        checkpoint.put(key, 0, ((2, 2), 'c'), '1/2')
+        checkpoint.put(key, 0, 'b', '-1')
+
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.path(facets) == moves
+        assert checkpoint.add_path(facets, moves) == key
+        assert checkpoint.values(key) == {(0, ((2, 2), 'c')): '1/2', (0, 'b'): '-1'}
+
+    with Checkpoint(path) as checkpoint, pytest.raises(TypeError):
+        checkpoint.put(key, 0, frozenset([1]), '0')
+
+
+def test_checkpoint_sage_integers(tmp_path):
+    sg = pytest.importorskip('sage.all')
+    path = str(tmp_path / 'checkpoint.jsonl')
+    facets = [[sg.Integer(1), sg.Integer(2)], [sg.Integer(2), sg.Integer(3)], [sg.Integer(3), sg.Integer(1)]]
+    moves = [[[sg.Integer(1), sg.Integer(2)], [sg.Integer(4)]]]
+    with Checkpoint(path) as checkpoint:
+        key = checkpoint.add_path(facets, moves)
+        checkpoint.put(key, 0, sg.Integer(4), sg.QQ(1) / 2)
+
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.path([[1, 2], [2, 3], [3, 1]]) == [[[1, 2], [4]]]
+        assert checkpoint.add_path([[1, 2], [2, 3], [3, 1]], [[[1, 2], [4]]]) == key
+        assert checkpoint.values(key) == {(0, 4): '1/2'}
@@ -0,0 +1,19 @@
+from spheres.cocycle_cache import CocycleCache
+
+
+def test_cocycle_cache(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    with CocycleCache(path, max_entries=10) as cache:
+        assert cache.get('a') is None
+        cache.put('a', '1/2')
+        cache.put('a', '1/2')
+        assert cache.get('a') == '1/2' and len(cache) == 1
+
+    with CocycleCache(path, max_entries=10) as cache:  # the values persist
+        assert 'a' in cache
+        for i in range(9):
+            cache.put(str(i), str(i))
+        assert cache.get('a') == '1/2'  # now it is the most recently used entry
+        cache.put('b', '-3')
+        assert len(cache) == 9
+        assert 'a' in cache and 'b' in cache and '0' not in cache and '1' not in cache
@@ -1,9 +1,11 @@
 import pytest
 from sage import all as sg
 
+import settings
 from settings import log_handler
-from spheres.gg_cocycle import GGCocycleHelper, chains_tensor_product
+from spheres.gg_cocycle import GGCocycleHelper, chains_tensor_product, gg, gg_cocycle, gg_many
 from spheres.simplicial_complex import Sphere, BistellarMove
+from spheres.utils import matrix_to_tensor, tensor_boundary_0, tensor_boundary_1, tensor_to_matrix
 
 log_handler.setLevel(100)
 
@@ -50,6 +52,68 @@ def test_chains11_to_products():
     assert q11 == c11
 
 
+@pytest.mark.gap
+def test_matrix_form_of_tensors():
+    s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
+    s = s.rename_vertices('int')
+    bm = BistellarMove(s, [1, 2, 6])
+
+    ggh = GGCocycleHelper(bm)
+
+    chains1 = ggh.chains1_base
+    chains12 = chains_tensor_product(chains1, ggh.chains2_base)
+    chain12 = chains1(sg.Simplex([1, 2])).tensor(ggh.chains2_base(sg.Simplex([1, 2, 6])))
+    x = tensor_to_matrix(chain12, chains1, ggh.chains2_base)
+
+    assert matrix_to_tensor(x, chains12, chains1, ggh.chains2_base) == chain12
+    chains02 = chains_tensor_product(ggh.chains0_base, ggh.chains2_base)
+    chain02 = matrix_to_tensor(tensor_boundary_0(x, ggh.boundary_matrix(1)), chains02, ggh.chains0_base,
+                               ggh.chains2_base)
+    assert chain02 == chains12.boundary_0(chain12)
+    assert matrix_to_tensor(tensor_boundary_1(x, ggh.boundary_matrix(2)), ggh.chains11, chains1, chains1) == \
+        chains12.boundary_1(chain12)
+    assert ggh.chains11.boundary_0(ggh.ksi) == 0 == ggh.chains11.boundary_1(ggh.ksi)
+
+
+@pytest.mark.gap
+def test_modular_backend():
+    s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
+    s = s.rename_vertices('int')
+    bm = BistellarMove(s, [1, 2, 6])
+
+    assert gg_cocycle(bm, backend='modular') == gg_cocycle(bm)
+
+
+@pytest.mark.gap
+def test_float64_backend(monkeypatch):
+    s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
+    s = s.rename_vertices('int')
+    bm = BistellarMove(s, [1, 2, 6])
+
+    assert gg_cocycle(bm, backend='float64') == gg_cocycle(bm) == gg_cocycle(bm, backend='float64', recheck=True)
+
+    monkeypatch.setattr(settings, 'GG_FLOAT_MAX_DENOMINATOR', 10 ** 6)  # the recovery is ambiguous, QQ is used
+    assert gg_cocycle(bm, backend='float64') == gg_cocycle(bm)
+
+
+@pytest.mark.gap
+def test_gg_many():
+    circle = sg.SimplicialComplex([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]])
+    s1 = Sphere(circle.join(sg.SimplicialComplex([[6, 7], [7, 8], [8, 6]]))).rename_vertices('int')
+    s2 = Sphere(circle.join(sg.SimplicialComplex([[6, 7], [7, 8], [8, 9], [9, 6]]))).rename_vertices('int')
+
+    res = dict(gg_many([s1, s2, s1], max_workers=2, path_backend='native'))
+    assert sorted(res) == [0, 1, 2]
+    assert res[0] == res[2] == gg(s1, path_backend='native')
+    assert res[1] == gg(s2, path_backend='native')
+
+    f = [[int(d) for d in str(n)] for n in
+         [1243, 1237, 1276, 2354, 2376, 3476, 3465, 4576, 2385, 2368,
+          5386, 4285, 4875, 4817, 4371, 7165, 1785, 1586, 1682, 1284]]
+    res = dict(gg_many([Sphere(f), s1], path_backend='unknown'))  # the path search fails, the batch goes on
+    assert isinstance(res[0], ValueError) and res[1] == 0  # s1 is isomorphic to -s1
+
+
 # @pytest.mark.gap
 # def test_l2_minimal_chain():
 #     s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
@@ -171,6 +235,24 @@ def test_ggh_inverse():
     assert ggh1.ggh == -ggh_r.ggh
 
 
+@pytest.mark.gap
+def test_canonical_key():
+    s = Sphere([[1, 4, 8], [1, 3, 4], [1, 8, 6], [4, 6, 8],
+                [1, 6, 2], [6, 4, 3], [1, 2, 3], [3, 2, 6]])
+
+    subst = {1: 5, 2: 7, 3: 4, 4: 3, 6: 1, 8: 8}
+
+    move = BistellarMove(s, [1, 3])
+    move_r = BistellarMove(s.rename_vertices(subst), [subst[q] for q in [1, 3]])
+    key, sign = move.canonical_key()
+    key_r, sign_r = move_r.canonical_key()
+
+    assert key == key_r
+    assert GGCocycleHelper(move).ggh * sign == GGCocycleHelper(move_r).ggh * sign_r
+    assert key == move.inverse().canonical_key()[0]  # s and move.t are isomorphic, so are the move and its inverse
+    assert key != BistellarMove(s, [1, 3, 4]).canonical_key()[0]
+
+
 if __name__ == '__main__':
     # test_to_dual_vertices()
     # test_chains11_to_products()
@@ -0,0 +1,43 @@
+from itertools import permutations, product
+
+from spheres.homology import is_homology_sphere, elementary_divisors, eliminate, h_vector
+
+
+def barycentric_subdivision(facets):
+    return [[frozenset(p[:i + 1]) for i in range(len(p))] for f in facets for p in permutations(f)]
+
+
+def cross_polytope(d):
+    return [[s * v for (s, v) in zip(signs, range(1, d + 1))] for signs in product([1, -1], repeat=d)]
+
+
+def test_is_homology_sphere():
+    assert is_homology_sphere([[1], [2]])
+    assert is_homology_sphere([[1, 2], [2, 3], [3, 1]])
+    assert not is_homology_sphere([[1, 2], [2, 3], [3, 1], [3, 4]])
+    assert is_homology_sphere(cross_polytope(3))
+    assert is_homology_sphere(barycentric_subdivision(cross_polytope(4)))
+
+    rp2 = [[1, 2, 3], [1, 3, 4], [1, 4, 5], [1, 5, 6], [1, 6, 2],
+           [2, 3, 5], [3, 4, 6], [4, 5, 2], [5, 6, 3], [6, 2, 4]]
+    assert not is_homology_sphere(rp2)
+
+
+def test_torsion():
+    """RP^3 as a quotient of subdivided boundary of cross-polytope, it has the rational homology of a sphere."""
+    antipodal = {}
+    for f in barycentric_subdivision(cross_polytope(4)):
+        f = frozenset(min(v, frozenset(-x for x in v), key=sorted) for v in f)
+        antipodal[f] = list(f)
+    assert not is_homology_sphere(list(antipodal.values()))
+
+
+def test_elimination():
+    assert eliminate([{0: 2, 1: 4}, {0: 6, 1: 8}], 7)[0] == 2
+    assert eliminate([{0: 2, 1: 4}, {0: 6, 1: 8}])[0] == 0
+    assert elementary_divisors([{0: 2, 1: 4}, {0: 6, 1: 8}]) == [2, 4]
+    assert elementary_divisors([{0: 2}, {1: 3}]) == [1, 6]
+
+
+def test_h_vector():
+    assert h_vector([1, 6, 12, 8]) == [1, 3, 3, 1]
@@ -0,0 +1,36 @@
+from spheres.invariants import LRUCache, memoized, shared_invariants
+
+
+class Obj:
+    def __init__(self, key):
+        self.key = key
+
+    def canonical_key(self):
+        return self.key, 1
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache.get('a') == 1
+    cache['c'] = 3
+    assert 'a' in cache and 'b' not in cache and len(cache) == 2
+    assert cache.get('b', 0) == 0
+
+
+def test_memoized():
+    shared_invariants.clear()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    a, b, c = Obj('x'), Obj('x'), Obj('y')
+    assert memoized(a, 'n', compute) == 1
+    assert memoized(a, 'n', compute) == 1
+    assert memoized(b, 'n', compute) == 1  # isomorphic objects share the value
+    assert memoized(c, 'n', compute) == 2
+    assert memoized(b, 'm', compute, shared=False) == 3
+    assert memoized(a, 'm', compute, shared=False) == 4
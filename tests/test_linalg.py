@@ -0,0 +1,69 @@
+import pytest
+from sage import all as sg
+
+from spheres.linalg import LeftSolver, MinimalNormSolver, recover_rational, solver
+
+
+def test_left_solver():
+    d = sg.matrix(sg.QQ, [[1, -1, 0], [0, 1, -1], [1, 0, -1], [2, 0, 0]])
+    solver = LeftSolver(d)
+    b = [sg.vector(sg.QQ, [3, 0, -1]), sg.vector(sg.QQ, [0, 1, -1])]
+    x = solver.solve(b)
+    for i in range(len(b)):
+        assert x.row(i) * d == b[i]
+        assert x.row(i) == sg.linear_transformation(d).lift(b[i])
+    assert solver.lift(b[0]) == x.row(0)
+
+    with pytest.raises(ValueError):
+        LeftSolver(d[:2]).lift(sg.vector(sg.QQ, [1, 0, 0]))
+
+
+def test_minimal_norm_solver():
+    d = sg.matrix(sg.QQ, [[1, -1, 0], [0, 1, -1], [1, 0, -1], [2, 0, 0]])
+    solver = MinimalNormSolver(d)
+    b = [sg.vector(sg.QQ, [3, 0, -1]), sg.vector(sg.QQ, [0, 1, -1])]
+    x = solver.solve(b)
+    ker = d.left_kernel().basis()
+    for i in range(len(b)):
+        assert x.row(i) * d == b[i]
+        assert all(x.row(i) * k == 0 for k in ker)  # no shorter solutions
+
+    with pytest.raises(ValueError):
+        MinimalNormSolver(d[:2]).lift(sg.vector(sg.QQ, [1, 0, 0]))
+
+
+def test_modular_backend():
+    d = sg.matrix(sg.QQ, [[1, -1, 0], [0, 1, -1], [1, 0, -1], [2, 0, 0], [sg.QQ(1) / 3, 5, 7]])
+    b = [sg.vector(sg.QQ, [3, 0, -1]), sg.vector(sg.QQ, [0, sg.QQ(1) / 2, -1])]
+    for minimal_norm in [False, True]:
+        exact = solver(d, 'qq', minimal_norm)
+        modular = solver(d, 'modular', minimal_norm)
+        assert modular.rows == exact.rows
+        assert modular.solve(b) == exact.solve(b)
+    assert solver(d, 'modular', True).pseudo_inverse == MinimalNormSolver(d).pseudo_inverse
+
+    with pytest.raises(ValueError):
+        solver(d[:2], 'modular').lift(sg.vector(sg.QQ, [1, 0, 0]))
+    with pytest.raises(ValueError):
+        solver(d, 'unknown')
+
+    d = sg.matrix(sg.QQ, 8, 6, lambda i, j: (i + 2) ** (j + 3) % 1009 - 500)  # needs several primes
+    b = sg.matrix(sg.QQ, 3, 8, lambda i, j: i - j) * d
+    assert solver(d, 'modular').solve(b) == LeftSolver(d).solve(b)
+
+
+def test_float64_backend():
+    d = sg.matrix(sg.QQ, [[1, -1, 0], [0, 1, -1], [1, 0, -1], [2, 0, 0]])
+    b = [sg.vector(sg.QQ, [3, 0, -1]), sg.vector(sg.QQ, [0, 1, -1])]
+    for minimal_norm in [False, True]:
+        x = solver(d, 'float64', minimal_norm).solve(b)
+        assert (x - solver(d, 'qq', minimal_norm).solve(b).change_ring(sg.RDF)).norm() < 1e-12
+
+    with pytest.raises(ValueError):
+        solver(d[:2], 'float64').lift(sg.vector(sg.QQ, [1, 0, 0]))
+
+    assert recover_rational(1 / 3 - 1e-13, 100) == sg.QQ(1) / 3
+    with pytest.raises(ArithmeticError):
+        recover_rational(0.123456789, 100)
+    with pytest.raises(ArithmeticError):
+        recover_rational(1 / 3, 10 ** 6)  # rationals with such denominators are closer than FLOAT_TOLERANCE
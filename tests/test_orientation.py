@@ -0,0 +1,94 @@
+import pickle
+from itertools import permutations
+
+from spheres.homology import is_consistently_oriented, is_homology_sphere
+from spheres.orientation import ridge_index, orient_facets, permutation_parity, OrientedFacetIndex, \
+    oriented_move_facets
+
+
+def is_even(f, g):
+    """Checks that sequence g is an even permutation of sequence f."""
+    g = list(g)
+    inversions = sum(g.index(a) > g.index(b) for i, a in enumerate(f) for b in f[i + 1:])
+    return inversions % 2 == 0
+
+
+def test_ridge_index():
+    octahedron = [[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)]
+    index = ridge_index(octahedron)
+    assert len(index) == 12
+    assert all(len(v) == 2 for v in index.values())
+
+
+def test_orient_facets():
+    octahedron = [[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)]
+    oriented = orient_facets(octahedron, [3, 1, 5])
+    assert oriented[0] == [3, 1, 5]
+    assert sorted(sorted(f) for f in oriented) == sorted(octahedron)
+
+    index = {frozenset(f): f for f in oriented}
+    for r, (i, j) in ridge_index(oriented).items():
+        f, g = oriented[i], oriented[j]
+        w, = set(g) - set(f)
+        neg = [v if v in r else w for v in f]
+        assert not is_even(neg, index[frozenset(g)])
+
+
+def test_orient_facets_simplex_boundary():
+    boundary = [list(f) for f in permutations(range(5), 4) if list(f) == sorted(f)]
+    oriented = orient_facets(boundary, [0, 1, 2, 3])
+    signs = {tuple(sorted(f)): is_even(sorted(f), f) for f in oriented}
+    for f, sign in signs.items():
+        missing, = set(range(5)) - set(f)
+        assert sign == ((4 - missing) % 2 == 0)
+
+
+def test_permutation_parity():
+    assert permutation_parity([1, 2, 3], [1, 2, 3]) == 0
+    assert permutation_parity([2, 1, 3], [1, 2, 3]) == 1
+    assert permutation_parity([2, 3, 1], [1, 2, 3]) == 0
+    assert permutation_parity([4, 3, 2, 1], [1, 2, 3, 4]) == 0
+
+
+def test_oriented_facet_index():
+    octahedron = [[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)]
+    index = OrientedFacetIndex(orient_facets(octahedron, [1, 3, 5]))
+    assert index.is_oriented([3, 5, 1])
+    assert index.are_oriented([[1, 3, 5], [1, 5, 3]]) == [True, False]
+
+    link = index.link([1])
+    assert sorted(sorted(s) for s in link) == [[3, 5], [3, 6], [4, 5], [4, 6]]
+    assert all(index.is_oriented(s + [1]) for s in link)
+
+
+def test_oriented_facet_index_moved():
+    octahedron = orient_facets([[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)], [1, 3, 5])
+    index = OrientedFacetIndex(octahedron)
+    assert len(index.star([1, 3])) == 2
+    star = index.star([1, 3, 5])
+    moved = index.moved(star, [[7, 3, 5], [1, 7, 5], [1, 3, 7]])
+    assert len(moved) == 10 and len(index) == 8
+    assert not moved.star([1, 3, 5]) and index.star([1, 3, 5]) == star
+    assert sorted(map(sorted, moved.star([7]))) == [[1, 3, 7], [1, 5, 7], [3, 5, 7]]
+    assert len(moved.star([1])) == 5 and len(index.star([1])) == 4
+    assert moved.is_oriented([1, 3, 7])
+
+
+def test_oriented_move_facets():
+    octahedron = orient_facets([[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)], [1, 3, 5])
+    index = OrientedFacetIndex(octahedron)
+    star = index.star([1, 3])
+    t = index.moved(star, oriented_move_facets(star, [1, 3], [5, 6]))
+    assert sorted(map(sorted, t.star([5, 6]))) == [[1, 5, 6], [3, 5, 6]]
+    assert is_homology_sphere(t.star([])) and is_consistently_oriented(t.star([]))
+    assert all(t.is_oriented(f) for f in octahedron if not {1, 3} <= set(f))
+
+    star = index.star([1, 3, 5])
+    t = index.moved(star, oriented_move_facets(star, [1, 3, 5], [7]))
+    assert len(t) == 10 and is_consistently_oriented(t.star([]))
+    star = t.star([7])
+    r = t.moved(star, oriented_move_facets(star, [7], [1, 3, 5]))
+    assert all(r.is_oriented(f) for f in octahedron)
+
+    q = pickle.loads(pickle.dumps(r))
+    assert sorted(q.star([])) == sorted(r.star([]))
@@ -0,0 +1,47 @@
+import pickle
+
+import numpy as np
+
+from spheres.homology import is_consistently_oriented, is_homology_sphere
+from spheres.oriented_sphere import OrientedSphere
+
+OCTAHEDRON = [[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)]
+
+
+def test_adjacency():
+    s = OrientedSphere.from_facets(OCTAHEDRON)
+    adjacency = s.adjacency
+    assert adjacency.shape == (8, 3)
+    for i, f in enumerate(s.facets.tolist()):
+        for k in range(3):
+            g = s.facets[adjacency[i, k]].tolist()
+            assert set(f) - {f[k]} < set(g)
+
+
+def test_bistellar_move():
+    s = OrientedSphere.from_facets(OCTAHEDRON)
+    tau, t = s.bistellar_move([1, 3])
+    assert sorted(tau) == [5, 6]
+    assert is_homology_sphere(t.oriented_facets())
+    assert is_consistently_oriented(t.oriented_facets())
+    f = next(f for f in s.oriented_facets() if not {1, 3} <= set(f))
+    assert t.check_oriented_facet(f)
+
+    tau, t = s.bistellar_move([1, 3, 5], new_vertex_name=7)
+    assert tau == [7]
+    assert len(t) == 10 and is_consistently_oriented(t.oriented_facets())
+    sigma, r = t.bistellar_move([7])
+    assert sorted(sigma) == [1, 3, 5]
+    assert sorted(sorted(f) for f in r.oriented_facets()) == sorted(OCTAHEDRON)
+    assert all(r.check_oriented_facet(f) for f in s.oriented_facets())
+
+
+def test_link_and_pickle():
+    s = OrientedSphere.from_facets(OCTAHEDRON, oriented_facet=[1, 5, 3])
+    link = s.link_oriented([1])
+    assert sorted(link.vertices()) == [3, 4, 5, 6]
+    assert all(s.check_oriented_facet(f + [1]) for f in link.oriented_facets())
+
+    q = pickle.loads(pickle.dumps(s))
+    assert q.labels == s.labels
+    assert np.array_equal(q.facets, s.facets)
@@ -0,0 +1,42 @@
+import time
+from functools import partial
+from itertools import product
+
+import pytest
+
+from spheres.bistellar import find_path_to_simplex
+from spheres.path_search import portfolio_seeds, run_portfolio
+
+
+def cross_polytope(d):
+    return [[s * v for (s, v) in zip(signs, range(1, d + 1))] for signs in product([1, -1], repeat=d)]
+
+
+def fake_search(seed, stop_event):
+    """Path of length seed found in seed / 10 seconds, odd seeds fail."""
+    deadline = time.monotonic() + seed / 10
+    while time.monotonic() < deadline:
+        if stop_event.is_set():
+            raise TimeoutError
+        time.sleep(.01)
+    if seed % 2:
+        raise ValueError(seed)
+    return [None] * seed
+
+
+def test_run_portfolio():
+    assert portfolio_seeds(3, 5) == [5, 6, 7]
+    assert len(portfolio_seeds(4)) == 4
+
+    start = time.monotonic()
+    assert len(run_portfolio(fake_search, [6, 2, 30], keep='first')) == 2
+    assert time.monotonic() - start < 2  # the slow search is cancelled
+    assert len(run_portfolio(fake_search, [6, 3, 4], keep='shortest')) == 4
+    with pytest.raises(ValueError):
+        run_portfolio(fake_search, [1, 3])
+
+
+def test_native_portfolio():
+    search = partial(find_path_to_simplex, cross_polytope(4), 60)
+    paths = [search(seed=seed) for seed in [0, 1, 2]]
+    assert len(run_portfolio(search, [0, 1, 2], keep='shortest', processes=True)) == min(len(p) for p in paths)
@@ -0,0 +1,43 @@
+from itertools import product
+
+import pytest
+
+from spheres.bistellar import find_path_to_simplex
+from spheres.oriented_sphere import OrientedSphere
+from spheres.path_shortening import cancel_inverse_pairs, remove_cycles, shorten_path
+
+OCTAHEDRON = [[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)]
+
+
+def cross_polytope(d):
+    return [[s * v for (s, v) in zip(signs, range(1, d + 1))] for signs in product([1, -1], repeat=d)]
+
+
+def test_remove_cycles():
+    moves = [[[1, 3], [5, 6]], [[5, 6], [1, 3]], [[1, 3, 5], [7]], [[2, 4, 6], [8]], [[7], [1, 3, 5]]]
+    assert remove_cycles(OCTAHEDRON, moves) == moves[2:]
+    assert shorten_path(OCTAHEDRON, moves) == ([[[2, 4, 6], [8]]],
+                                               {'before': 5, 'after': 1, 'cycles': 2, 'inverse_pairs': 2})
+    with pytest.raises(ValueError):
+        remove_cycles(OCTAHEDRON, [[[1, 2], [3, 4]]])
+
+
+def test_cancel_inverse_pairs():
+    moves = [[[1, 3, 5], [7]], [[2, 4, 6], [8]], [[7], [1, 3, 5]]]  # the middle move commutes with the others
+    assert cancel_inverse_pairs(OCTAHEDRON, moves) == [[[2, 4, 6], [8]]]
+    moves = [[[1, 3, 5], [7]], [[1, 3, 7], [9]], [[7], [1, 3, 5]]]  # the middle move needs vertex 7
+    assert cancel_inverse_pairs(OCTAHEDRON, moves) == moves
+
+
+def test_shorten_path():
+    facets = cross_polytope(5)
+    moves = find_path_to_simplex(facets, timeout=60, seed=0)
+    short, report = shorten_path(facets, moves)
+    assert report['before'] == len(moves) and report['after'] == len(short) <= len(moves)
+    assert report['before'] - report['after'] == report['cycles'] + report['inverse_pairs']
+
+    s = OrientedSphere.from_facets(facets)
+    for sigma, tau in short:
+        tau_, s = s.bistellar_move(sigma, new_vertex_name=tau[0] if len(tau) == 1 else None)
+        assert set(tau_) == set(tau)
+    assert len(s) == 6
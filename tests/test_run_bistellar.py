@@ -1,10 +1,12 @@
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 import sage.all as sg
 
 from settings import gap_path, TMP_DIR
-from spheres.gap_executor import gap_execute_commands, ListenerNLines
+from spheres.gap_executor import gap_execute_commands, ListenerNLines, GapSessionPool
 from spheres.simplicial_complex import Sphere, BistellarMove
 
 
@@ -27,28 +29,37 @@ def test_gap_system(commands, results):
         assert res == true_res
 
 
+@pytest.mark.gap
+def test_gap_session_pool():
+    if gap_path is None:
+        return
+
+    with GapSessionPool(2) as pool:
+        assert pool.execute(['1+1;']) == [(['2\n'], 'ok', {})]
+        assert pool.execute([('Sleep(2);', 1)])[0][2] == {'timeout': True}  # the busy session is replaced
+        assert pool.execute(['2+3;', '3+3;']) == [(['5\n'], 'ok', {}), (['6\n'], 'ok', {})]
+
+        stats = pool.latency_stats()  # the timed out request is not counted
+        assert stats['count'] == 3 + 3 * len(pool.reset_commands)
+        assert stats['max'] < 1
+
+
 @pytest.mark.gap
 @pytest.mark.parametrize('timeout, result', [(3, 'timeout'), (120, 'ok')])
 def test_bistellar(timeout, result):
     """The test on BISTELLAR execution. 3 seconds is not enough, but 120 seconds is enough."""
-    log_file, out_file, in_file = f'{TMP_DIR}/BISTELLAR.log', f'{TMP_DIR}/BISTELLAR.out', f'{TMP_DIR}/BISTELLAR.in'
-
-    for f in (log_file, out_file, in_file):
-        try:
-            os.remove(f)
-        except FileNotFoundError:
-            pass
-
     bistellar_path = os.path.join(os.path.dirname(__file__), '../spheres/BISTELLAR.gap')
 
-    status = gap_execute_commands([f'log_file := String("{log_file}");',
-                                   f'out_file := String("{out_file}");',
-                                   f'in_file := String("{in_file}");',
-                                   f'type_of_object := 2;',
-                                   f'facets := [];',
-                                   f'polytope_dimension := 6;',
-                                   f'number_of_vertices := 20;',
-                                   (f'Read("{bistellar_path}");', timeout)])
+    with tempfile.TemporaryDirectory(dir=TMP_DIR) as work_dir:
+        log_file, out_file, in_file = (os.path.join(work_dir, f'BISTELLAR.{ext}') for ext in ('log', 'out', 'in'))
+        status = gap_execute_commands([f'log_file := String("{log_file}");',
+                                       f'out_file := String("{out_file}");',
+                                       f'in_file := String("{in_file}");',
+                                       f'type_of_object := 2;',
+                                       f'facets := [];',
+                                       f'polytope_dimension := 6;',
+                                       f'number_of_vertices := 20;',
+                                       (f'Read("{bistellar_path}");', timeout)])
     if result == 'timeout':
         assert status[-1] == ('', 'ok', {'timeout': True})
     elif result == 'ok':
@@ -72,5 +83,19 @@ def test_path_to_simplex(s, timeout):
         assert s.is_isomorphic(Sphere(sg.Simplex(s.dimension() + 1).faces()))[0]
 
 
+@pytest.mark.gap
+def test_concurrent_path_to_simplex():
+    """Searches running at once in different threads use separate work files."""
+    if gap_path is None:
+        return
+
+    spheres = [Sphere([[1, 2], [2, 3], [3, 4], [4, 1]]).join(sg.SimplicialComplex([[5], [6]]))
+               .as_sphere().rename_vertices('int') for _ in range(3)]
+    with ThreadPoolExecutor(3) as executor:
+        paths = list(executor.map(lambda s: s.path_to_simplex(60), spheres))
+    for s, path in zip(spheres, paths):
+        assert len(path[-1].t.facets()) == s.dimension() + 2
+
+
 if __name__ == '__main__':
     test_bistellar(3, 'timeout')
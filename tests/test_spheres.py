@@ -1,6 +1,10 @@
+import pytest
 from sage import all as sg
 
-from spheres.simplicial_complex import Sphere, BistellarMove
+import settings
+
+from spheres.oriented_sphere import OrientedSphere
+from spheres.simplicial_complex import Sphere, BistellarMove, Chain, change_orientation, move_from_task
 
 
 def test_is_sphere():
@@ -12,6 +16,26 @@ def test_is_sphere():
     assert not circle.product(circle).is_homology_sphere()
 
 
+def test_sphere_validation():
+    two_circles = [[1, 2], [2, 3], [1, 3], [4, 5], [5, 6], [4, 6]]
+    with pytest.raises(ValueError):
+        Sphere(two_circles, validate='cheap')
+    Sphere(two_circles, validate='none')
+
+    circle = sg.SimplicialComplex([[1, 2], [1, 3], [2, 3]])
+    torus = list(circle.product(circle).facets())
+    Sphere(torus, validate='cheap')
+    with pytest.raises(ValueError):
+        Sphere(torus)
+
+    settings.SPHERE_FULL_VALIDATION = True
+    try:
+        with pytest.raises(ValueError):
+            Sphere(torus, validate='none')
+    finally:
+        settings.SPHERE_FULL_VALIDATION = False
+
+
 def test_rename_vertices():
     g = sg.SimplicialComplex([[1, 2, 3], [1, 4, 5], [2, 4], [2, 6]])
     assert g.automorphism_group().order() == 1
@@ -23,6 +47,10 @@ def test_rename_vertices():
     assert iso[0]
     assert iso[1] == {v: k for (k, v) in substitution.items()}
 
+    s = Sphere([[1, 2], [2, 3], [3, 1]])
+    with pytest.raises(ValueError):
+        s.rename_vertices({1: 0, 2: 0})
+
 
 def test_sphere():
     s = Sphere([[1, 2], [1, 3], [2, 3]]).join(sg.SimplicialComplex([[5], [6]])).as_sphere()
@@ -72,6 +100,42 @@ def test_link_bistellar():
     assert l3_sphere.is_isomorphic(Sphere(l_sphere.link_oriented([3])))
 
 
+def test_link_task():
+    s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
+    bm0 = BistellarMove(s.rename_vertices('int'), [1, 2, 6])
+
+    for bm in [BistellarMove(bm0.t, [3, 4, 7]), bm0.inverse()]:
+        for v in [v for simplex in [bm.sigma, bm.tau] if len(simplex) > 1 for v in simplex]:  # as in gg
+            link = bm.link([v])
+            task = bm.link_task([v])
+            move = move_from_task(task)
+            assert set(move.sigma) == set(link.sigma) and set(move.tau) == set(link.tau)
+            assert move.s.facets() == link.s.facets()
+            assert move.canonical_key() == link.canonical_key()
+
+
+def test_compact():
+    s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
+    s0 = s.rename_vertices('int')
+    q = OrientedSphere.from_sphere(s0).to_sphere()
+    assert q.facets() == s0.facets() and q.facets_with_orientation == s0.facets_with_orientation
+
+    bm = BistellarMove(s0, [1, 2, 6])
+    assert bm.t.compact.oriented_facets() == bm.t.facets_with_orientation
+    assert all(bm.t.check_oriented_facets(f + [8] for f in bm.t.link_oriented([8])))
+    suspension = bm.skew_suspension()
+    assert suspension.is_homology_sphere() and suspension.compact.dimension() == 3
+
+
+def test_path_to_simplex_native():
+    s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
+    s = BistellarMove(s.rename_vertices('int'), [1, 2, 6]).t
+
+    q = s.path_to_simplex(10, backend='native', seed=1)
+    assert q[0].s is s
+    assert q[-1].t.is_isomorphic(Sphere(sg.Simplex(s.dimension() + 1).faces()))[0]
+
+
 def test_chain_in_spheres():
     s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
     s0 = s.rename_vertices('int')
@@ -83,6 +147,26 @@ def test_chain_in_spheres():
     assert len(chain3.data) == 0
 
 
+def test_chain_terms():
+    f = [[int(d) for d in str(n)] for n in
+         [1243, 1237, 1276, 2354, 2376, 3476, 3465, 4576, 2385, 2368,
+          5386, 4285, 4875, 4817, 4371, 7165, 1785, 1586, 1682, 1284]]
+    s = Sphere(f)  # a 3-sphere without orientation reversing automorphisms
+    r = s.rename_vertices({v: v + 10 for v in s.vertices()})
+    minus_r = Sphere([change_orientation(q) for q in r.facets_with_orientation], oriented=True)
+
+    assert Chain(Sphere, [(1, s), (2, r)]).data == [(3, s)]
+    assert Chain(Sphere, [(1, s), (1, minus_r)]).data == []
+    assert (Chain(Sphere, [(1, s)]) - Chain(Sphere, [(1, r)]) * 2).data == [(-1, s)]
+
+    o = Sphere([[a, b, c] for a in (1, 2) for b in (3, 4) for c in (5, 6)])
+    minus_o = Sphere([change_orientation(q) for q in o.facets_with_orientation], oriented=True)
+    assert o.is_minus_self()
+    for q in [o, minus_o]:  # over ZZ the coefficient of q isomorphic to -q is 1 whatever its orientation
+        assert Chain(Sphere, [(1, q)]).data == Chain(Sphere, [(-1, q)]).data == [(1, q)]
+        assert Chain(Sphere, [(3, q), (-1, q)]).data == []
+
+
 def test_barycentric():
     s = Sphere([[1, 2], [2, 3], [3, 4], [4, 5], [5, 1]]).join(sg.SimplicialComplex([[6], [7]])).as_sphere()
     s0 = s.rename_vertices('int')
@@ -94,9 +178,14 @@ def test_barycentric():
 
 if __name__ == '__main__':
     test_is_sphere()
+    test_sphere_validation()
     test_rename_vertices()
     test_sphere()
     test_bistellar()
     test_link_bistellar()
+    test_link_task()
+    test_compact()
+    test_path_to_simplex_native()
     test_chain_in_spheres()
+    test_chain_terms()
     test_barycentric()
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import pickle
+import time
+
+import pytest
+
+from spheres.work_queue import FileQueueExecutor, _claim, _dirs, run_worker
+
+
+def test_file_queue(tmp_path):
+    directory = str(tmp_path)
+    workers = [multiprocessing.Process(target=run_worker, args=(directory, .01, 2)) for _ in range(2)]
+    for w in workers:
+        w.start()
+
+    executor = FileQueueExecutor(directory, poll_interval=.01)
+    futures = [executor.submit(pow, i, 2) for i in range(20)]
+    error = executor.submit(int, 'x')
+    assert [f.result(timeout=30) for f in futures] == [i ** 2 for i in range(20)]
+    with pytest.raises(ValueError):
+        error.result(timeout=30)
+    executor.shutdown()
+
+    for w in workers:
+        w.join()
+
+
+def test_requeue(tmp_path):
+    directory = str(tmp_path)
+    executor = FileQueueExecutor(directory, poll_interval=.01, requeue_after=.1)
+    future = executor.submit(pow, 3, 2)
+    (tmp_path / 'claimed' / 'x').write_text('')  # not a task of this executor
+    for task in (tmp_path / 'tasks').iterdir():
+        task.rename(tmp_path / 'claimed' / f'{task.name}.0.dead-worker')
+
+    assert run_worker(directory, .01, idle_timeout=.5) == 1
+    assert future.result(timeout=5) == 9
+    executor.shutdown()
+
+
+def test_requeue_duplicate_result(tmp_path):
+    directory = str(tmp_path)
+    executor = FileQueueExecutor(directory, poll_interval=.01, requeue_after=.1)
+    future = executor.submit(pow, 3, 2)
+    task, = (tmp_path / 'tasks').iterdir()
+    task.rename(tmp_path / 'claimed' / f'{task.name}.0.slow-worker')
+
+    assert run_worker(directory, .01, idle_timeout=.5) == 1
+    assert future.result(timeout=5) == 9
+    (tmp_path / 'results' / task.name).write_bytes(pickle.dumps((True, 9)))  # the slow worker finishes too
+    time.sleep(.2)
+    executor.shutdown()
+    assert not list((tmp_path / 'results').iterdir())
+
+
+def test_requeue_after_claim(tmp_path):
+    directory = str(tmp_path)
+    executor = FileQueueExecutor(directory, poll_interval=10, requeue_after=.2)
+    future = executor.submit(pow, 3, 2)
+    time.sleep(.5)  # the task waits in the queue longer than requeue_after
+    claimed = _claim(_dirs(directory), 'worker')
+    executor._requeue()
+    assert [p.name for p in (tmp_path / 'claimed').iterdir()] == [os.path.basename(claimed)]
+    assert not future.done()
+    executor.shutdown(wait=False)